@@ -0,0 +1,87 @@
+"""
+Compare inference latency of the available model backends.
+
+    python Benchmark/backends.py --backends pytorch onnx openvino --batches 1 4 8
+
+Frames are synthetic noise at the camera resolution, so no camera is needed.
+Each one goes through its own Letterbox at the configured inference.imgsz and
+the batch through ModelInference.infer_batch, the same path as the pipeline:
+ms/batch is the inference scheduler's cost, and the letterbox column the
+per-frame preprocessing each camera thread pays before it.
+"""
+import argparse
+import os
+import sys
+from time import perf_counter
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "Vision"), os.path.join(ROOT, "Camera")]
+
+from Memory.memory import MemoryData
+from infer import ModelInference
+from model import load_model
+from preprocess import Letterbox
+
+
+def letterbox_frames(frames, imgsz):
+    """One tensor per frame, each from its own Letterbox as one camera each; median ms per frame"""
+    tensors, timings = [], []
+    for frame in frames:
+        letterbox = Letterbox(imgsz)
+        start = perf_counter()
+        tensor, _ = letterbox(frame)
+        timings.append(perf_counter() - start)
+        tensors.append(tensor)
+    return tensors, float(np.median(timings)) * 1000
+
+
+def time_infer_batch(inference, tensors, iterations):
+    """Median seconds per infer_batch call over iterations runs"""
+    timings = []
+    for _ in range(iterations):
+        start = perf_counter()
+        inference.infer_batch(tensors)
+        timings.append(perf_counter() - start)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["pytorch", "onnx", "openvino"])
+    parser.add_argument("--batches", nargs="+", type=int, default=[1, 4, 8])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--imgsz", type=int, help="Defaults to inference.imgsz from memory.json")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    args = parser.parse_args()
+
+    memory = MemoryData()
+    imgsz = args.imgsz or memory.get_nested("inference.imgsz") or 640
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (args.height, args.width, 3), dtype=np.uint8)
+              for _ in range(max(args.batches))]
+    tensors, letterbox_ms = letterbox_frames(frames, imgsz)
+
+    rows = []
+    for backend in args.backends:
+        model = load_model(backend, imgsz)
+        # load_model falls back to PyTorch, so report what was actually loaded
+        artifact = os.path.basename(str(model.model_name).rstrip("/\\"))
+        inference = ModelInference(model, memory)
+        inference.infer_activated = True  # Measure even if inference is switched off in memory.json
+        inference.infer_batch(tensors[:1])  # Warm-up
+        for batch in args.batches:
+            seconds = time_infer_batch(inference, tensors[:batch], args.iterations)
+            rows.append((backend, artifact, batch, seconds * 1000, seconds * 1000 / batch, batch / seconds))
+    memory.close()
+
+    print(f"imgsz {imgsz}, letterbox {letterbox_ms:.1f} ms/frame from {args.width}x{args.height}")
+    print(f"{'backend':<10} {'artifact':<40} {'batch':>5} {'ms/batch':>10} {'ms/frame':>10} {'frames/s':>10}")
+    for backend, artifact, batch, ms_batch, ms_frame, fps in rows:
+        print(f"{backend:<10} {artifact:<40} {batch:>5} {ms_batch:>10.1f} {ms_frame:>10.1f} {fps:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Local stand-in for the Telegram Bot API.
+
+Answers the methods Sentinel uses with well-formed messages, counts uploads
+versus sends by file_id and can inject per-request latency. Point the bot at
+it with "bot.api_url" in memory.json, or run it standalone:
+
+    python Benchmark/fake_telegram.py --port 8081 --latency 0.2
+"""
+import argparse
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import sleep, time
+from urllib.parse import parse_qs, urlparse
+
+MEDIA_METHODS = {"sendPhoto": "photo", "sendVideo": "video", "sendDocument": "document"}
+
+
+class FakeTelegramServer:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, throttle_every=0):
+        self.latency = latency
+        # Answer every Nth send with 429 Too Many Requests, to exercise retry_after handling
+        self.throttle_every = throttle_every
+        self.throttled = 0
+        self.send_attempts = 0
+        self.lock = threading.Lock()
+        self.calls = Counter()
+        self.uploads = 0
+        self.by_reference = 0
+        self.bytes_received = 0
+        self.sent = []  # [(method, chat_id, file_id, timestamp)]
+        self.next_id = 0
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="fake-telegram", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "calls": dict(self.calls),
+                "uploads": self.uploads,
+                "by_reference": self.by_reference,
+                "bytes_received": self.bytes_received,
+                "throttled": self.throttled,
+            }
+
+    def _new_id(self):
+        with self.lock:
+            self.next_id += 1
+            return self.next_id
+
+    def _media(self, kind, file_id):
+        media = {"file_id": file_id, "file_unique_id": f"u{file_id}"}
+        if kind == "photo":
+            return [dict(media, width=1280, height=720)]
+        if kind == "video":
+            return dict(media, width=1280, height=720, duration=3)
+        return media
+
+    def _message(self, chat_id, **extra):
+        message = {
+            "message_id": self._new_id(),
+            "date": int(time()),
+            "chat": {"id": int(chat_id) if str(chat_id).lstrip("-").isdigit() else 0, "type": "private"},
+        }
+        message.update(extra)
+        return message
+
+    def should_throttle(self, method):
+        if not self.throttle_every or not method.startswith("send"):
+            return False
+        with self.lock:
+            self.send_attempts += 1
+            if self.send_attempts % self.throttle_every == 0:
+                self.throttled += 1
+                return True
+        return False
+
+    def handle(self, method, params, body, multipart):
+        """Build the API result for one call and record it"""
+        with self.lock:
+            self.calls[method] += 1
+            self.bytes_received += len(body)
+        if self.latency:
+            sleep(self.latency)
+
+        if method == "getMe":
+            return {"id": 1, "is_bot": True, "first_name": "Sentinel", "username": "sentinel_bot"}
+        if method == "getUpdates":
+            sleep(min(float(params.get("timeout", 0) or 0), 1.0))
+            return []
+        if method in ("deleteWebhook", "setMyCommands"):
+            return True
+
+        chat_id = params.get("chat_id", "0")
+        if method in MEDIA_METHODS:
+            kind = MEDIA_METHODS[method]
+            reference = params.get(kind)
+            with self.lock:
+                if multipart or not reference:
+                    self.uploads += 1
+                    file_id = f"fake-{kind}-{self.next_id + 1}"
+                else:
+                    self.by_reference += 1
+                    file_id = reference
+                self.sent.append((method, chat_id, file_id, time()))
+            return self._message(chat_id, caption=params.get("caption", ""), **{kind: self._media(kind, file_id)})
+        if method == "sendMediaGroup":
+            items = json.loads(params.get("media", "[]"))
+            messages = []
+            for item in items:
+                kind = item.get("type", "photo")
+                reference = item.get("media", "")
+                with self.lock:
+                    if reference.startswith("attach://"):
+                        self.uploads += 1
+                        file_id = f"fake-{kind}-{self.next_id + 1}"
+                    else:
+                        self.by_reference += 1
+                        file_id = reference
+                    self.sent.append((method, chat_id, file_id, time()))
+                messages.append(self._message(chat_id, **{kind: self._media(kind, file_id)}))
+            return messages
+        if method == "sendMessage":
+            with self.lock:
+                self.sent.append((method, chat_id, None, time()))
+            return self._message(chat_id, text=params.get("text", ""))
+        return True
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _respond(self):
+                parsed = urlparse(self.path)
+                method = parsed.path.rstrip("/").rsplit("/", 1)[-1]
+                params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                content_type = self.headers.get("Content-Type", "")
+                if content_type.startswith("application/x-www-form-urlencoded"):
+                    params.update({k: v[0] for k, v in parse_qs(body.decode()).items()})
+                if server.should_throttle(method):
+                    status = 429
+                    payload = json.dumps({"ok": False, "error_code": 429,
+                                          "description": "Too Many Requests: retry after 1",
+                                          "parameters": {"retry_after": 1}}).encode()
+                else:
+                    status = 200
+                    result = server.handle(method, params, body, content_type.startswith("multipart/"))
+                    payload = json.dumps({"ok": True, "result": result}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = _respond
+            do_POST = _respond
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request")
+    parser.add_argument("--throttle-every", type=int, default=0, help="Answer every Nth send with a 429")
+    args = parser.parse_args()
+    server = FakeTelegramServer(args.host, args.port, args.latency, args.throttle_every)
+    print(f"Fake Telegram API listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(server.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
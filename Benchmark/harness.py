@@ -0,0 +1,395 @@
+"""
+End-to-end throughput of CameraProcessor with synthetic cameras, a stub or
+real model and the fake Telegram API, headless and without network.
+
+    python Benchmark/harness.py --cameras 1 4 8 --duration 30
+    python Benchmark/harness.py --model pytorch --video clip.mp4 --fps 25
+
+Each scenario runs the real pipeline (grabbers, motion gate, rate control,
+batched inference, tracker, alert dispatcher and fan-out) against N cameras
+that loop generated frames, or a local video, at the given fps and
+resolution. The stub model sleeps a fixed latency per predict call and
+reports one person that comes and goes every --period seconds, so tracks and
+alerts are exercised too. Reported per scenario: frames/s through the camera
+loops, frames/s through the model, process CPU and RSS, and alert latency.
+
+To catch regressions, store a run with --json and compare later runs to it:
+
+    python Benchmark/harness.py --cameras 1 4 --json baseline.json
+    python Benchmark/harness.py --cameras 1 4 --baseline baseline.json --tolerance 0.2
+
+The run exits with status 1 when a scenario's throughput drops, or its alert
+latency grows, by more than the tolerance.
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+from time import sleep, time
+
+import cv2
+import numpy as np
+import psutil
+import torch
+from ultralytics.engine.results import Results
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "Vision"), os.path.join(ROOT, "Camera"), os.path.join(ROOT, "Benchmark")]
+
+from Memory.memory import MemoryData
+from Monitoring.metrics import REGISTRY
+from cameraProcessor import CameraProcessor
+from fake_telegram import FakeTelegramServer
+from model import load_model
+
+
+class SyntheticCapture:
+    """
+    Stand-in for cv2.VideoCapture that replays a loop of frames at a fixed
+    fps: grab() blocks until the next frame is due, like a live stream. The
+    frames are shared and read-only, so the pipeline must never draw on them.
+    """
+    def __init__(self, frames, fps, phase=0):
+        self.frames = frames
+        self.interval = 1.0 / fps
+        self.index = phase % len(frames)
+        self.next_due = time()
+        self.opened = True
+
+    def isOpened(self):
+        return self.opened
+
+    def set(self, prop, value):
+        return False
+
+    def get(self, prop):
+        height, width = self.frames[0].shape[:2]
+        return {cv2.CAP_PROP_FRAME_WIDTH: width, cv2.CAP_PROP_FRAME_HEIGHT: height,
+                cv2.CAP_PROP_FPS: 1.0 / self.interval}.get(prop, 0.0)
+
+    def grab(self):
+        if not self.opened:
+            return False
+        wait = self.next_due - time()
+        if wait > 0:
+            sleep(wait)
+        self.next_due = max(self.next_due + self.interval, time() - self.interval)
+        self.index = (self.index + 1) % len(self.frames)
+        return True
+
+    def retrieve(self):
+        return (True, self.frames[self.index]) if self.opened else (False, None)
+
+    def read(self):
+        return self.retrieve() if self.grab() else (False, None)
+
+    def release(self):
+        self.opened = False
+
+
+class ClosedCapture:
+    """Capture of a channel the scenario does not have: never opens."""
+    def isOpened(self):
+        return False
+
+    def set(self, prop, value):
+        return False
+
+    def release(self):
+        pass
+
+
+def generated_frames(width, height, count):
+    """Textured background with a block that walks across it, so the motion gate fires."""
+    y, x = np.mgrid[0:height, 0:width]
+    background = np.dstack([(x * 255 // max(width - 1, 1)), (y * 255 // max(height - 1, 1)),
+                            np.full_like(x, 128)]).astype(np.uint8)
+    cv2.putText(background, "synthetic", (width // 20, height // 8), cv2.FONT_HERSHEY_SIMPLEX,
+                height / 400, (255, 255, 255), 2)
+    block_w, block_h = width // 10, height // 3
+    frames = []
+    for i in range(count):
+        frame = background.copy()
+        x1 = int((width - block_w) * i / max(count - 1, 1))
+        y1 = height // 2
+        cv2.rectangle(frame, (x1, y1), (x1 + block_w, y1 + block_h), (40, 40, 40), -1)
+        frames.append(frame)
+    return frames
+
+
+def video_frames(path, width, height, count):
+    """Up to count frames of a local video, resized to the scenario's resolution."""
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if frame.shape[1] != width or frame.shape[0] != height:
+            frame = cv2.resize(frame, (width, height))
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        raise SystemExit(f"Could not read frames from {path}")
+    return frames
+
+
+class SyntheticCameras:
+    """capture_factory for CameraProcessor: channels 1..cameras replay frames, the rest fail to open."""
+    def __init__(self, cameras, frames, fps):
+        for frame in frames:
+            frame.flags.writeable = False
+        self.cameras = cameras
+        self.frames = frames
+        self.fps = fps
+
+    def __call__(self, url):
+        match = re.search(r"channel=(\d+)", url)
+        channel = int(match.group(1)) if match else 0
+        if not 1 <= channel <= self.cameras:
+            return ClosedCapture()
+        # Each camera starts at a different point of the loop
+        return SyntheticCapture(self.frames, self.fps, phase=channel * len(self.frames) // self.cameras)
+
+
+class StubModel:
+    """
+    Model with the predict() signature of ultralytics' YOLO that sleeps
+    latency + per_frame * batch seconds and returns Results. A person box is
+    reported during the first `present` seconds of every `period`, and then
+    disappears long enough for the tracker to drop it.
+    """
+    def __init__(self, imgsz=640, latency=0.03, per_frame=0.005, period=10.0, present=6.0):
+        self.imgsz = imgsz
+        self.latency = latency
+        self.per_frame = per_frame
+        self.period = period
+        self.present = present
+        self.images = {}  # {(height, width): blank image for Results}
+        self.nobody = torch.zeros((0, 6))
+
+    def person(self, height, width):
+        """A box centred in the model input, half its height tall"""
+        side = height / 4
+        return torch.tensor([[width / 2 - side / 2, height / 2 - side, width / 2 + side / 2, height / 2 + side,
+                              0.9, 0.0]])
+
+    def predict(self, frames, classes=None, verbose=False):
+        batch = len(frames) if isinstance(frames, (list, torch.Tensor)) else 1
+        height, width = frames.shape[2:] if isinstance(frames, torch.Tensor) else (self.imgsz, self.imgsz)
+        sleep(self.latency + self.per_frame * batch)
+        image = self.images.get((height, width))
+        if image is None:
+            image = self.images[(height, width)] = np.zeros((height, width, 3), dtype=np.uint8)
+        boxes = self.person(height, width) if time() % self.period < self.present else self.nobody
+        return [Results(image, path="", names={0: "person"}, boxes=boxes) for _ in range(batch)]
+
+
+def histogram_totals(name):
+    """(count, sum) of a histogram over all its series"""
+    count, total = 0, 0.0
+    for _, child in REGISTRY.get(name).samples():
+        _, child_sum, child_count = child.get()
+        count += child_count
+        total += child_sum
+    return count, total
+
+
+def histogram_buckets(name):
+    metric = REGISTRY.get(name)
+    counts = [0] * (len(metric.buckets) + 1)
+    for _, child in metric.samples():
+        for i, value in enumerate(child.get()[0]):
+            counts[i] += value
+    return counts
+
+
+def counter_total(name):
+    return sum(child.get() for _, child in REGISTRY.get(name).samples())
+
+
+def bucket_quantile(buckets, counts, q):
+    """Upper bound of the bucket holding quantile q, like Histogram's quantile()"""
+    total = sum(counts)
+    if not total:
+        return None
+    cumulative = 0
+    for bound, count in zip(tuple(buckets) + (float("inf"),), counts):
+        cumulative += count
+        if cumulative >= q * total:
+            return bound
+    return float("inf")
+
+
+def scenario_memory(directory, cameras, args, telegram_url):
+    """memory.json for a headless run against the fake Telegram API"""
+    with open(os.path.join(ROOT, "Memory", "memory.json"), encoding="utf-8") as f:
+        data = json.load(f)
+    data["inference"]["activated"]["status"] = True
+    data["inference"]["imgsz"] = args.imgsz
+    data["bot"].update({"token": "123456:benchmark", "api_url": telegram_url,
+                        "subscribers": [str(1000 + i) for i in range(args.subscribers)]})
+    data["network_settings"].update({"ip": "127.0.0.1", "protocol": "synthetic",
+                                     "username": "bench", "password": "bench"})
+    data["capture"].update({"mode": "thread", "channels": cameras})
+    data["metrics"]["enabled"] = False
+    data["display"] = {"enabled": False}
+    path = os.path.join(directory, "memory.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4)
+    return path
+
+
+def run_scenario(cameras, model, frames, args):
+    directory = tempfile.mkdtemp(prefix="sentinel-bench-")
+    telegram = FakeTelegramServer(latency=args.telegram_latency).start()
+    memory = MemoryData(scenario_memory(directory, cameras, args, telegram.url))
+    processor = CameraProcessor(memory, model, capture_factory=SyntheticCameras(cameras, frames, args.fps))
+    runner = threading.Thread(target=processor.start, name="bench-processor", daemon=True)
+    runner.start()
+    process = psutil.Process()
+
+    sleep(args.warmup)
+    start = time()
+    frames_before = counter_total("sentinel_frames_processed")
+    inferred_before = counter_total("sentinel_inference_frames")
+    alerts_before = histogram_totals("sentinel_alert_latency_seconds")
+    buckets_before = histogram_buckets("sentinel_alert_latency_seconds")
+    cpu_before = sum(process.cpu_times()[:2])
+    peak_rss = process.memory_info().rss
+    while time() - start < args.duration:
+        sleep(0.5)
+        peak_rss = max(peak_rss, process.memory_info().rss)
+    elapsed = time() - start
+    cpu = (sum(process.cpu_times()[:2]) - cpu_before) / elapsed * 100
+    frames_processed = counter_total("sentinel_frames_processed") - frames_before
+    inferred = counter_total("sentinel_inference_frames") - inferred_before
+
+    # No new alerts, then let the queued ones reach the fake API before stopping
+    processor.model_inference.infer_activated = False
+    deadline = time() + args.drain
+    delivered = histogram_totals("sentinel_alert_latency_seconds")[0]
+    while time() < deadline:
+        sleep(1.0)
+        now_delivered = histogram_totals("sentinel_alert_latency_seconds")[0]
+        if processor.bot.alert_dispatcher.qsize() == 0 and now_delivered == delivered:
+            break
+        delivered = now_delivered
+    count, total = histogram_totals("sentinel_alert_latency_seconds")
+    count, total = count - alerts_before[0], total - alerts_before[1]
+    counts = [after - before for after, before in
+              zip(histogram_buckets("sentinel_alert_latency_seconds"), buckets_before)]
+
+    processor.stop()
+    runner.join(timeout=15)
+    telegram.stop()
+    shutil.rmtree(directory, ignore_errors=True)
+    return {
+        "cameras": len(processor.active_cameras),
+        "frames_per_second": frames_processed / elapsed,
+        "inferences_per_second": inferred / elapsed,
+        "cpu_percent": cpu,
+        "peak_rss_mb": peak_rss / 1024 / 1024,
+        "alerts": count,
+        "alert_latency_mean_s": total / count if count else None,
+        "alert_latency_p95_s": bucket_quantile(REGISTRY.get("sentinel_alert_latency_seconds").buckets, counts, 0.95),
+        "telegram_calls": telegram.stats()["calls"],
+    }
+
+
+# Metric -> True when higher is better; checked against --baseline
+BASELINE_METRICS = {
+    "frames_per_second": True,
+    "inferences_per_second": True,
+    "alert_latency_mean_s": False,
+    "alert_latency_p95_s": False,
+}
+
+
+def compare_to_baseline(rows, baseline, tolerance):
+    """Regressions of rows against the scenarios of a previous --json run, as messages"""
+    previous = {row["cameras"]: row for row in baseline["scenarios"]}
+    regressions = []
+    for row in rows:
+        reference = previous.get(row["cameras"])
+        if reference is None:
+            continue
+        for metric, higher_is_better in BASELINE_METRICS.items():
+            value, expected = row.get(metric), reference.get(metric)
+            if value is None or expected is None:
+                continue
+            if higher_is_better:
+                regressed = value < expected * (1 - tolerance)
+            else:
+                regressed = value > expected * (1 + tolerance)
+            if regressed:
+                regressions.append(f"{row['cameras']} cameras: {metric} {value:.2f}, baseline {expected:.2f}")
+    return regressions
+
+
+def format_seconds(value):
+    return f"{value:.2f}" if value is not None else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cameras", nargs="+", type=int, default=[1, 4, 8], help="Cameras per scenario")
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Seconds run before measuring")
+    parser.add_argument("--drain", type=float, default=15.0, help="Max seconds to wait for queued alerts")
+    parser.add_argument("--fps", type=float, default=15.0)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--video", help="Loop this local video instead of generated frames")
+    parser.add_argument("--loop-frames", type=int, default=60, help="Frames kept in memory and looped")
+    parser.add_argument("--model", default="stub", help="stub, or a backend for load_model: pytorch, onnx, openvino")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--stub-latency", type=float, default=0.03, help="Stub seconds per predict call")
+    parser.add_argument("--stub-per-frame", type=float, default=0.005, help="Stub seconds added per frame in the batch")
+    parser.add_argument("--period", type=float, default=10.0, help="Stub seconds between person appearances")
+    parser.add_argument("--subscribers", type=int, default=2)
+    parser.add_argument("--telegram-latency", type=float, default=0.05, help="Fake API seconds per request")
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--baseline", help="Results of a previous --json run; exit with status 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative drop in throughput or rise in latency against --baseline")
+    args = parser.parse_args()
+
+    if any(cameras < 1 for cameras in args.cameras):
+        parser.error("--cameras must be at least 1")
+    if args.video:
+        frames = video_frames(args.video, args.width, args.height, args.loop_frames)
+    else:
+        frames = generated_frames(args.width, args.height, args.loop_frames)
+    if args.model == "stub":
+        model = StubModel(args.imgsz, args.stub_latency, args.stub_per_frame, args.period, args.period * 0.6)
+    else:
+        model = load_model(args.model, args.imgsz)
+
+    rows = [run_scenario(cameras, model, frames, args) for cameras in args.cameras]
+
+    print(f"{'cameras':>7} {'frames/s':>9} {'infer/s':>8} {'cpu %':>7} {'rss MB':>7} "
+          f"{'alerts':>6} {'lat avg s':>9} {'lat p95 s':>9}")
+    for row in rows:
+        print(f"{row['cameras']:>7} {row['frames_per_second']:>9.1f} {row['inferences_per_second']:>8.1f} "
+              f"{row['cpu_percent']:>7.0f} {row['peak_rss_mb']:>7.0f} {row['alerts']:>6} "
+              f"{format_seconds(row['alert_latency_mean_s']):>9} {format_seconds(row['alert_latency_p95_s']):>9}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "scenarios": rows}, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_to_baseline(rows, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
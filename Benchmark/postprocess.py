@@ -0,0 +1,89 @@
+"""
+Per-frame detection post-processing cost, per-box loop versus vectorized.
+
+    python Benchmark/postprocess.py --boxes 0 10 100
+
+"before" is the previous draw_boxes loop, which indexes every box tensor in
+Python; "after" is extract_detections plus draw_boxes on the structured array.
+Results are built with ultralytics' own Results/Boxes classes from random boxes,
+so no model or camera is needed.
+"""
+import argparse
+import os
+import sys
+from time import perf_counter
+
+import cv2
+import numpy as np
+import torch
+from ultralytics.engine.results import Results
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "Vision"), os.path.join(ROOT, "Camera")]
+
+from utils import extract_detections, draw_boxes
+
+WIDTH, HEIGHT = 640, 480
+
+
+def fake_results(count, rng):
+    """One Results object with count person boxes, half of them over the threshold."""
+    x1 = rng.uniform(0, WIDTH - 60, count)
+    y1 = rng.uniform(0, HEIGHT - 120, count)
+    data = np.stack([x1, y1, x1 + 50, y1 + 110,
+                     rng.uniform(0.2, 0.9, count), np.zeros(count)], axis=1).astype(np.float32)
+    image = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    return [Results(image, path="", names={0: "person"}, boxes=torch.from_numpy(data).reshape(-1, 6))]
+
+
+def legacy_draw_boxes(frame, results, infer_threshold):
+    """draw_boxes as it was before vectorization, without the counter bookkeeping"""
+    boxes = []
+    for result in results:
+        for box in result.boxes:
+            if int(box.cls[0]) == 0 and box.conf[0] >= infer_threshold:
+                x1, y1, x2, y2 = map(int, box.xyxy[0])
+                conf = box.conf[0]
+                boxes.append((x1, y1, x2, y2, conf))
+                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+                cv2.putText(frame, f"Persona {conf:.2f}", (x1, y1 - 10),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+    return boxes
+
+
+def vectorized(frame, results, infer_threshold):
+    detections = extract_detections(results, infer_threshold)
+    draw_boxes(frame, detections)
+    return detections
+
+
+def time_postprocess(function, results, iterations, threshold):
+    """Median milliseconds per frame"""
+    frame = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    timings = []
+    for _ in range(iterations):
+        start = perf_counter()
+        function(frame, results, threshold)
+        timings.append(perf_counter() - start)
+    return float(np.median(timings)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--boxes", nargs="+", type=int, default=[0, 10, 100])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--threshold", type=float, default=0.5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'boxes':>5} {'kept':>5} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    for count in args.boxes:
+        results = fake_results(count, rng)
+        kept = len(extract_detections(results, args.threshold))
+        before = time_postprocess(legacy_draw_boxes, results, args.iterations, args.threshold)
+        after = time_postprocess(vectorized, results, args.iterations, args.threshold)
+        print(f"{count:>5} {kept:>5} {before:>10.3f} {after:>10.3f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
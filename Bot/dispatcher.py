@@ -0,0 +1,195 @@
+import threading
+from collections import deque
+from datetime import datetime
+from time import time
+
+
+PRIORITY_NEW = 0  # Primera alerta de una cámara después de un período sin actividad
+PRIORITY_FOLLOW_UP = 1  # Alertas siguientes de una actividad ya notificada
+
+
+class AlertEvent:
+    """Alerta lista para enviar: frames de una cámara más su metadata."""
+    def __init__(self, camera_id, frames, created_at=None, trigger_time=None, ready_at=None,
+                 priority=PRIORITY_NEW, trace=None):
+        self.camera_id = camera_id
+        self.frames = frames  # [{'frame': ndarray, 'timestamp': datetime}]
+        self.created_at = created_at or datetime.now()
+        self.trigger_time = trigger_time if trigger_time is not None else time()
+        # No se despacha antes de ready_at (p. ej. para esperar el post-roll del clip)
+        self.ready_at = ready_at if ready_at is not None else self.trigger_time
+        self.last_trigger_time = self.trigger_time
+        self.priority = priority
+        self.subscribers = None  # None: todos; en un reintento, solo los que faltaron
+        self.attempts = 0
+        self.trace = trace  # Trace del frame que disparó la alerta, para medir la latencia
+
+    def merge(self, other, max_frames):
+        """Agrega los frames de otra alerta de la misma cámara, conservando los más nuevos."""
+        self.frames = (self.frames + other.frames)[-max_frames:]
+        self.priority = min(self.priority, other.priority)
+        # ready_at no se extiende: una actividad continua no debe demorar la alerta
+        self.last_trigger_time = max(self.last_trigger_time, other.last_trigger_time)
+        # La latencia se mide desde la primera detección, así que se conserva la traza original
+        self.trace = self.trace or other.trace
+
+
+class AlertDispatcher:
+    """
+    Cola acotada de alertas atendida por hilos dedicados, para que el hilo de
+    la cámara solo encole el evento y nunca espere la codificación ni la subida.
+
+    Políticas cuando llega una alerta:
+    - si ya hay una alerta pendiente de la misma cámara, se fusionan (coalesce);
+    - si la cola está llena, se descarta la pendiente de menor prioridad más
+      antigua, salvo que la nueva valga menos: en ese caso se rechaza la nueva.
+
+    Entre las alertas listas se despacha primero la de mayor prioridad. Las
+    alertas de otras cámaras disparadas dentro de coalesce_window segundos se
+    entregan juntas al handler, que las envía como un único álbum cuando todas
+    cumplieron su ready_at.
+    """
+    MAX_GROUP = 10  # Telegram admite hasta 10 items por álbum
+
+    def __init__(self, handler, max_queue=16, workers=1, max_frames=30, coalesce_window=0.0):
+        self.handler = handler
+        self.max_queue = max_queue
+        self.workers = workers
+        self.max_frames = max_frames
+        self.coalesce_window = coalesce_window
+        self.pending = deque()
+        self.condition = threading.Condition()
+        self.threads = []
+        self.running = False
+        # Contadores
+        self.enqueued = 0
+        self.retried = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def start(self):
+        with self.condition:
+            if self.running:
+                return
+            self.running = True
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"alert-worker-{i}", daemon=True)
+            self.threads.append(thread)
+            thread.start()
+
+    def stop(self, timeout=5.0):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def submit(self, event: AlertEvent):
+        """Encola una alerta sin bloquear. Devuelve False si se descartó esta u otra alerta por falta de lugar."""
+        with self.condition:
+            for pending in self.pending:
+                if pending.camera_id == event.camera_id and pending.subscribers is None:
+                    pending.merge(event, self.max_frames)
+                    self.coalesced += 1
+                    return True
+            return self._append(event)
+
+    def requeue(self, event: AlertEvent, delay):
+        """Vuelve a encolar una alerta que no llegó a todos sus destinatarios."""
+        event.attempts += 1
+        event.ready_at = time() + delay
+        with self.condition:
+            return self._append(event, retry=True)
+
+    @staticmethod
+    def _drop_rank(event):
+        # Mayor rango, primero en descartarse: la menos prioritaria; entre iguales, la más antigua
+        return (event.priority, -event.trigger_time)
+
+    def _append(self, event, retry=False):
+        accepted = True
+        if len(self.pending) >= self.max_queue:
+            victim = max(self.pending, key=self._drop_rank)
+            self.dropped += 1
+            if self._drop_rank(event) > self._drop_rank(victim):
+                return False  # La nueva vale menos que todas las pendientes
+            self.pending.remove(victim)
+            accepted = False
+        self.pending.append(event)
+        if retry:
+            self.retried += 1
+        else:
+            self.enqueued += 1
+        self.condition.notify()
+        return accepted
+
+    def qsize(self):
+        with self.condition:
+            return len(self.pending)
+
+    def stats(self):
+        with self.condition:
+            return {
+                "pending": len(self.pending),
+                "enqueued": self.enqueued,
+                "retried": self.retried,
+                "coalesced": self.coalesced,
+                "dropped": self.dropped,
+            }
+
+    def _next_ready(self):
+        """Saca la alerta lista más prioritaria; si ninguna lo está, devuelve cuánto esperar."""
+        now = time()
+        ready_at = {event: self._group_ready_at(event) for event in self.pending}
+        ready = [event for event in self.pending if ready_at[event] <= now]
+        if not ready:
+            return None, min(ready_at.values()) - now
+        event = min(ready, key=lambda e: (e.priority, ready_at[e]))
+        self.pending.remove(event)
+        return event, None
+
+    def _group_candidates(self, event):
+        """Alertas pendientes de otras cámaras disparadas cerca de event."""
+        if self.coalesce_window <= 0 or event.subscribers is not None:
+            return []
+        candidates = [other for other in sorted(self.pending, key=lambda e: e.trigger_time)
+                      if other is not event and other.subscribers is None and
+                      abs(other.trigger_time - event.trigger_time) <= self.coalesce_window]
+        return candidates[:self.MAX_GROUP - 1]
+
+    def _group_ready_at(self, event):
+        # El álbum espera el post-roll de todas sus alertas; como solo se suman las
+        # disparadas dentro de coalesce_window, la demora queda acotada por la ventana
+        return max([event.ready_at] + [other.ready_at for other in self._group_candidates(event)])
+
+    def _collect_group(self, event):
+        """Alertas de otras cámaras disparadas cerca de event, para enviarlas juntas."""
+        group = [event] + self._group_candidates(event)
+        for other in group[1:]:
+            self.pending.remove(other)
+        self.coalesced += len(group) - 1
+        return group
+
+    def _run(self):
+        while True:
+            with self.condition:
+                event = None
+                while self.running and event is None:
+                    if not self.pending:
+                        self.condition.wait()
+                        continue
+                    event, wait = self._next_ready()
+                    if event is None:
+                        self.condition.wait(wait)
+                if not self.running:
+                    return
+                group = self._collect_group(event)
+            for item in group:
+                if item.trace is not None:
+                    item.trace.mark("dispatched")
+            try:
+                self.handler(group)
+            except Exception as e:
+                cameras = ", ".join(str(item.camera_id) for item in group)
+                print(f"Error dispatching alert for cameras {cameras}: {e}")
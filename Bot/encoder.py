@@ -0,0 +1,120 @@
+import itertools
+import os
+import shutil
+import subprocess
+import tempfile
+import cv2
+
+
+class ClipEncoder:
+    """
+    Codifica frames BGR en un MP4 H.264 compatible con Telegram en una sola
+    pasada. Con ffmpeg disponible los frames crudos se envían por stdin a
+    libx264; si no, se usa cv2.VideoWriter escribiendo directo el MP4.
+    Los frames se consumen de a uno, así que pueden venir de un generador sin
+    cargar el clip entero en memoria. Cada clip usa un archivo temporal único
+    y se devuelve en memoria.
+    """
+    def __init__(self, fps=10, ffmpeg_path="ffmpeg"):
+        self.fps = fps
+        self.ffmpeg = shutil.which(ffmpeg_path)
+        # fourcc de OpenCV que funcionó la primera vez; "" si ninguno abre
+        self.opencv_codec = None
+
+    def encode(self, frames):
+        """Devuelve los bytes del MP4, o None si ningún encoder pudo generarlo."""
+        frames = iter(frames)
+        first = next(frames, None)
+        if first is None:
+            return None
+        height, width = first.shape[:2]
+        frames = itertools.chain([first], frames)
+        fd, path = tempfile.mkstemp(prefix="sentinel_clip_", suffix=".mp4")
+        os.close(fd)
+        try:
+            process = self._start_ffmpeg(width, height, path) if self.ffmpeg is not None else None
+            if process is not None:
+                # Los frames ya se consumieron: si ffmpeg falla no se reintenta con OpenCV
+                encoded = self._encode_ffmpeg(process, frames, width, height)
+            else:
+                encoded = self._encode_opencv(frames, width, height, path)
+            if encoded and os.path.getsize(path) > 0:
+                with open(path, "rb") as f:
+                    return f.read()
+            return None
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _start_ffmpeg(self, width, height, path):
+        command = [
+            self.ffmpeg, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24",
+            "-s", f"{width}x{height}", "-r", str(self.fps),
+            "-i", "-",
+            "-an", "-c:v", "libx264", "-preset", "ultrafast",
+            # yuv420p needs even dimensions
+            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+            "-pix_fmt", "yuv420p", "-movflags", "+faststart",
+            path,
+        ]
+        try:
+            return subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        except OSError as e:
+            print(f"ffmpeg clip encoding failed: {e}")
+            return None
+
+    def _encode_ffmpeg(self, process, frames, width, height):
+        try:
+            for frame in frames:
+                if frame.shape[:2] != (height, width):
+                    frame = cv2.resize(frame, (width, height))
+                process.stdin.write(frame.tobytes())
+            _, stderr = process.communicate()
+        except (OSError, ValueError) as e:
+            process.kill()
+            process.wait()
+            print(f"ffmpeg clip encoding failed: {e}")
+            return False
+        if process.returncode != 0:
+            print(f"ffmpeg clip encoding failed: {stderr.decode(errors='replace').strip()}")
+            return False
+        return True
+
+    def _encode_opencv(self, frames, width, height, path):
+        out = self._open_writer(path, width, height)
+        if out is None:
+            return False
+        for frame in frames:
+            if frame.shape[:2] != (height, width):
+                frame = cv2.resize(frame, (width, height))
+            out.write(frame)
+        out.release()
+        return True
+
+    def _open_writer(self, path, width, height):
+        if self.opencv_codec is not None:
+            if not self.opencv_codec:
+                return None
+            out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*self.opencv_codec), self.fps, (width, height),
+                                  isColor=True)
+            if out.isOpened():
+                return out
+            out.release()
+            print(f"OpenCV could not open a {self.opencv_codec} writer")
+            return None
+        # Probed once: avc1 produces H.264 when OpenCV was built with it; mp4v always works
+        for codec in ("avc1", "mp4v"):
+            out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*codec), self.fps, (width, height), isColor=True)
+            if out.isOpened():
+                self.opencv_codec = codec
+                if codec != "avc1":
+                    print(f"No H.264 encoder in OpenCV; clips are encoded as {codec} (MPEG-4), "
+                          f"which some Telegram clients do not play inline")
+                return out
+            out.release()
+        self.opencv_codec = ""
+        print("No MP4 encoder available in OpenCV")
+        return None
@@ -0,0 +1,127 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from telebot.apihelper import ApiTelegramException
+from telebot.types import InputMediaPhoto, InputMediaVideo
+from Bot.ratelimit import RateLimiter
+
+
+def video_file_id(message):
+    """file_id del video enviado; Telegram puede devolverlo como animation o document."""
+    for attr in ("video", "animation", "document"):
+        media = getattr(message, attr, None)
+        if media is not None:
+            return media.file_id
+    return None
+
+
+def photo_file_id(message):
+    """file_id de la foto enviada (la de mayor resolución)."""
+    return message.photo[-1].file_id if getattr(message, "photo", None) else None
+
+
+def album_file_ids(messages):
+    """file_ids de un álbum, en el mismo orden en que se enviaron los items."""
+    file_ids = [video_file_id(m) or photo_file_id(m) for m in messages or []]
+    return file_ids if file_ids and all(file_ids) else None
+
+
+def retry_after(error):
+    """Segundos de espera pedidos por Telegram en un error 429, o None."""
+    if getattr(error, "error_code", None) != 429:
+        return None
+    parameters = (getattr(error, "result_json", None) or {}).get("parameters") or {}
+    return parameters.get("retry_after", 1)
+
+
+def rewind(media):
+    for item in media if isinstance(media, list) else [media]:
+        if hasattr(item, "seek"):
+            item.seek(0)
+
+
+class AlertFanout:
+    """
+    Envía una alerta a todos los suscriptores subiendo el archivo una sola vez.
+    El primer envío sube el contenido y devuelve el file_id que asigna Telegram;
+    al resto se le envía ese file_id en paralelo, con un pool de hilos acotado.
+    Cada envío pasa por el RateLimiter y respeta los retry_after de Telegram.
+    """
+    MAX_RETRIES = 3
+
+    def __init__(self, bot, max_workers=4, limiter: RateLimiter = None):
+        self.bot = bot
+        self.limiter = limiter or RateLimiter()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="alert-fanout")
+
+    def send_video(self, subscribers, video, caption):
+        return self._fanout(subscribers, self._send_single(self.bot.send_video, caption),
+                            video, video_file_id)
+
+    def send_photo(self, subscribers, photo, caption):
+        return self._fanout(subscribers, self._send_single(self.bot.send_photo, caption),
+                            photo, photo_file_id)
+
+    def send_album(self, subscribers, items, caption):
+        """items: [(kind, media)] con kind 'video' o 'photo'; caption va en el primer item."""
+        kinds = [kind for kind, _ in items]
+
+        def send(chat_id, media):
+            album = []
+            for i, (kind, item) in enumerate(zip(kinds, media)):
+                input_media = InputMediaVideo if kind == "video" else InputMediaPhoto
+                album.append(input_media(item, caption=caption if i == 0 else None))
+            return self.bot.send_media_group(chat_id, album)
+
+        return self._fanout(subscribers, send, [media for _, media in items], album_file_ids)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+    def _send_single(self, method, caption):
+        return lambda chat_id, media: method(chat_id, media, caption=caption)
+
+    def _send(self, send, chat_id, media):
+        """Envía respetando el rate limit; reintenta los 429 después del retry_after."""
+        for attempt in range(self.MAX_RETRIES + 1):
+            self.limiter.acquire(chat_id)
+            try:
+                return send(chat_id, media)
+            except ApiTelegramException as e:
+                wait = retry_after(e)
+                if wait is None or attempt == self.MAX_RETRIES:
+                    raise
+                print(f"Telegram rate limit for {chat_id}, retrying in {wait}s")
+                self.limiter.block(chat_id, wait)
+                rewind(media)
+
+    def _fanout(self, subscribers, send, media, file_id_of):
+        """Devuelve la lista de chats a los que se entregó la alerta."""
+        delivered = []
+        remaining = list(subscribers)
+        file_id = None
+
+        # Subir una vez; si falla para un chat, se reintenta la subida con el siguiente
+        while remaining and file_id is None:
+            chat_id = remaining.pop(0)
+            try:
+                message = self._send(send, chat_id, media)
+                delivered.append(chat_id)
+                file_id = file_id_of(message)
+            except Exception as e:
+                print(f"Error uploading alert to {chat_id}: {e}")
+            if file_id is None:
+                rewind(media)
+        if file_id is None:
+            return delivered
+
+        futures = {
+            self.executor.submit(self._send, send, chat_id, file_id): chat_id
+            for chat_id in remaining
+        }
+        for future in as_completed(futures):
+            chat_id = futures[future]
+            try:
+                future.result()
+                delivered.append(chat_id)
+            except Exception as e:
+                print(f"Error sending alert to {chat_id}: {e}")
+        return delivered
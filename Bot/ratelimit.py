@@ -0,0 +1,74 @@
+import threading
+from time import monotonic, sleep
+
+
+class TokenBucket:
+    """Token bucket clásico: rate tokens por segundo, hasta capacity acumulados."""
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = monotonic()
+        self.blocked_until = 0.0
+
+    def wait_time(self, now):
+        """Segundos hasta que haya un token disponible (0 si ya lo hay)."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self.tokens -= 1
+
+    def block(self, seconds):
+        """Bloquea el bucket, p. ej. por un retry_after de Telegram."""
+        self.blocked_until = max(self.blocked_until, monotonic() + seconds)
+
+
+class RateLimiter:
+    """
+    Límites de la Bot API de Telegram: un bucket global para todo el bot y
+    uno por chat (más restrictivo para grupos, cuyos ids son negativos).
+    acquire() bloquea al hilo que envía hasta que ambos buckets lo permitan.
+    """
+    def __init__(self, global_per_second=30, chat_per_second=1, group_per_minute=20):
+        self.global_bucket = TokenBucket(global_per_second, global_per_second)
+        self.chat_per_second = chat_per_second
+        self.group_per_minute = group_per_minute
+        self.chat_buckets = {}  # {chat_id: TokenBucket}
+        self.lock = threading.Lock()
+
+    def _chat_bucket(self, chat_id):
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if str(chat_id).startswith("-"):
+                bucket = TokenBucket(self.group_per_minute / 60.0, 1)
+            else:
+                bucket = TokenBucket(self.chat_per_second, 1)
+            self.chat_buckets[chat_id] = bucket
+        return bucket
+
+    def acquire(self, chat_id):
+        """Espera hasta poder enviar un mensaje al chat y consume los tokens."""
+        while True:
+            with self.lock:
+                now = monotonic()
+                chat_bucket = self._chat_bucket(chat_id)
+                wait = max(self.global_bucket.wait_time(now), chat_bucket.wait_time(now))
+                if wait <= 0:
+                    self.global_bucket.consume()
+                    chat_bucket.consume()
+                    return
+            sleep(wait)
+
+    def block(self, chat_id, seconds):
+        """Aplica un retry_after: sin chat_id bloquea el envío global."""
+        with self.lock:
+            if chat_id is None:
+                self.global_bucket.block(seconds)
+            else:
+                self._chat_bucket(chat_id).block(seconds)
@@ -1,265 +1,374 @@
-import threading
 import telebot
 import cv2
-import torch
-from queue import Queue
-from collections import deque
+import sys
 import time
-import os
+import io
 import Memory.memory as memory
 import tracemalloc
-import torch
 from infer import ModelInference
-import subprocess
-from datetime import datetime, timedelta
+from zones import parse_polygon
+from Bot.dispatcher import AlertDispatcher, AlertEvent, PRIORITY_NEW, PRIORITY_FOLLOW_UP
+from Bot.fanout import AlertFanout
+from telebot.types import InputMediaPhoto
+from Bot.ratelimit import RateLimiter
+from Bot.encoder import ClipEncoder
+from datetime import datetime
+from Monitoring.metrics import REGISTRY
+from Monitoring.tracing import TRACER
+from Monitoring.profiler import PROFILER, process_stats
+
+ALERT_ENCODE_SECONDS = REGISTRY.histogram("sentinel_alert_encode_seconds", "Time to build an alert's media", ["kind"])
+ALERT_SEND_SECONDS = REGISTRY.histogram("sentinel_alert_send_seconds", "Time to upload and fan out an alert", ["kind"])
+ALERT_LATENCY = REGISTRY.histogram("sentinel_alert_latency_seconds", "From detection to delivery, post-roll included", ["camera"])
+ALERTS_SENT = REGISTRY.counter("sentinel_alerts_sent", "Alert messages delivered to at least one subscriber", ["kind"])
+ALERT_MISSED = REGISTRY.counter("sentinel_alert_missed_subscribers", "Subscribers an alert attempt did not reach")
+ALERT_QUEUE_DEPTH = REGISTRY.gauge("sentinel_alert_queue_depth", "Alerts waiting for an alert worker")
+ALERTS_DROPPED = REGISTRY.counter("sentinel_alerts_dropped", "Alerts dropped because the queue was full")
 
 
 class TelegramBot:
-    def __init__(self, token, model_inference: ModelInference, camera_manager, memory_data: memory.MemoryData):
+    def __init__(self, token, model_inference: ModelInference, camera_manager, memory_data: memory.MemoryData, camera_processor=None):
+        # Optional Bot API endpoint, e.g. a local fake server for tests and benchmarks
+        api_url = memory_data.get_nested("bot.api_url")
+        if api_url:
+            telebot.apihelper.API_URL = api_url.rstrip("/") + "/bot{0}/{1}"
+            telebot.apihelper.FILE_URL = api_url.rstrip("/") + "/file/bot{0}/{1}"
         self.bot = telebot.TeleBot(token)
         self.model_inference = model_inference
         self.camera_manager = camera_manager
+        self.camera_processor = camera_processor
         self.memory_data = memory_data
-        # Dictionary to store camera-specific frame buffers
-        self.camera_buffers = {}  # {camera_id: deque()}
-        # Control de rate limiting
-        self.last_sent_time = datetime.now()
-        self.messages_in_minute = 0
-        self.MAX_MESSAGES_PER_MINUTE = 19
-        self.MIN_INTERVAL = 3
+        # Control de rate limiting: token buckets global y por chat con los límites de Telegram
+        limits = memory_data.get_nested("bot.rate_limits") or {}
+        self.rate_limiter = RateLimiter(
+            global_per_second=limits.get("global_per_second", 30),
+            chat_per_second=limits.get("chat_per_second", 1),
+            group_per_minute=limits.get("group_per_minute", 20),
+        )
+        # Alerts after this many quiet seconds on a camera jump ahead of follow-ups
+        self.ALERT_COOLDOWN = 60
+        self.ALERT_MAX_ATTEMPTS = 3
+        self.last_alert_times = {}  # {camera_id: epoch seconds}
         
         # Video configuration
-        self.VIDEO_FPS = 10
+        self.VIDEO_FPS = memory_data.get_nested("recording.fps") or 10
         self.VIDEO_MAX_DURATION = 10  # seconds
         self.VIDEO_THRESHOLD = 5  # minimum frames for video
-        self.MAX_BUFFER_SIZE = 30  # frames per camera
+        self.MAX_BUFFER_SIZE = 30  # detection frames kept per alert
+        self.ALBUM_MAX_ITEMS = 10  # Telegram limit per media group
+        # Seconds of recorded footage before the first and after the last detection
+        self.PRE_ROLL = 5
+        self.POST_ROLL = 3
+        self.recording_enabled = memory_data.get_nested("recording.enabled") is not False
+        self.clip_encoder = ClipEncoder(fps=self.VIDEO_FPS)
+        
+        # Alerts are encoded and uploaded on dedicated workers, never on camera threads
+        self.alert_dispatcher = AlertDispatcher(
+            self.handle_alert,
+            max_queue=memory_data.get_nested("alerts.queue_size") or 16,
+            workers=memory_data.get_nested("alerts.workers") or 1,
+            max_frames=self.MAX_BUFFER_SIZE,
+            coalesce_window=memory_data.get_nested("alerts.coalesce_window") or 0,
+        )
+        # Media is uploaded once and sent to the remaining subscribers by file_id
+        self.fanout = AlertFanout(self.bot, max_workers=memory_data.get_nested("alerts.fanout_workers") or 4,
+                                  limiter=self.rate_limiter)
+        ALERT_QUEUE_DEPTH.set_function(self.alert_dispatcher.qsize)
+        # Previous /stats sample, to report rates over the interval between calls
+        self.last_stats = (time.time(), {})
         
-        # Lock for synchronization
-        self.send_lock = threading.Lock()
-        self.buffer_locks = {}  # {camera_id: threading.Lock()}
+        # Subscribers and alert timing follow configuration changes without a restart
+        self.subscribers = ()
+        self.apply_config(memory_data.config)
+        memory_data.subscribe(self.apply_config)
         
         self.register_handlers()
         
-    def get_or_create_buffer(self, camera_id):
-        """Get or create a buffer for a specific camera."""
-        if camera_id not in self.camera_buffers:
-            self.camera_buffers[camera_id] = deque(maxlen=self.MAX_BUFFER_SIZE)
-            self.buffer_locks[camera_id] = threading.Lock()
-        return self.camera_buffers[camera_id]
+    def apply_config(self, config: memory.ConfigSnapshot):
+        """Take the values read on every alert from the newest configuration snapshot."""
+        self.subscribers = config.get("bot.subscribers", ())
+        self.PRE_ROLL = config.get("recording.pre_roll", 5)
+        self.POST_ROLL = config.get("recording.post_roll", 3)
+        self.alert_dispatcher.coalesce_window = config.get("alerts.coalesce_window", 0)
         
-    def buffer_frame(self, frame, camera_id):
-        """Add a frame to the camera-specific buffer."""
-        buffer = self.get_or_create_buffer(camera_id)
-        with self.buffer_locks[camera_id]:
-            buffer.append({
-                'frame': frame,
-                'timestamp': datetime.now()
-            })
+    def process_detection(self, frame, camera_id, trace=None):
+        """Alert for a new confirmed track on a camera. Only enqueues the alert."""
+        trigger_time = time.time()
+        if trace is not None:
+            trace.mark("alert_queued", trigger_time)
+        frames = [{'frame': frame, 'timestamp': datetime.fromtimestamp(trigger_time)}]
+        ready_at = trigger_time + self.POST_ROLL if self.recording_enabled else trigger_time
+        quiet = trigger_time - self.last_alert_times.get(camera_id, 0) > self.ALERT_COOLDOWN
+        self.last_alert_times[camera_id] = trigger_time
+        # Tracks confirmed while the alert waits for its post-roll are merged into it
+        event = AlertEvent(camera_id, frames, trigger_time=trigger_time, ready_at=ready_at,
+                           priority=PRIORITY_NEW if quiet else PRIORITY_FOLLOW_UP, trace=trace)
+        if not self.alert_dispatcher.submit(event):
+            ALERTS_DROPPED.inc()
+    
+    def handle_alert(self, events):
+        """Runs on an alert worker: encode and upload one alert, or several cameras as one album."""
+        subscribers = events[0].subscribers or self.get_subscribers()
+        if not subscribers:
+            return
+        if len(events) == 1:
+            delivered = self.send_detection_message(subscribers, events[0])
+        else:
+            delivered = self.send_grouped_message(subscribers, events)
         
-    def process_detection(self, frame, camera_id):
-        """Process a new detection from a specific camera."""
-        self.buffer_frame(frame, camera_id)
-        buffer = self.get_or_create_buffer(camera_id)
+        if delivered:
+            now = time.time()
+            for event in events:
+                ALERT_LATENCY.labels(event.camera_id).observe(now - event.trigger_time)
+                if event.trace is not None:
+                    # Only the first delivery counts; retries reach the remaining subscribers later
+                    event.trace.mark("delivered", now)
+                    TRACER.record_alert(event.trace)
+                    event.trace = None
         
-        # Check if we should send a message
-        if len(buffer) >= self.VIDEO_THRESHOLD or (
-            buffer and (datetime.now() - buffer[0]['timestamp']).total_seconds() >= 10
-        ):
-            subscribers = self.get_subscribers()
-            self.send_detection_message(subscribers, camera_id)
-            
-    def can_send_message(self):
-        """Verifica si podemos enviar un nuevo mensaje según el rate limiting."""
-        now = datetime.now()
-        # Resetear contador si ha pasado un minuto
-        if (now - self.last_sent_time) > timedelta(minutes=1):
-            self.messages_in_minute = 0
+        # Retry the subscribers that were not reached instead of dropping the alert
+        missing = [subscriber for subscriber in subscribers if subscriber not in delivered]
+        if not missing:
+            return
+        ALERT_MISSED.inc(len(missing))
+        for event in events:
+            if event.attempts + 1 < self.ALERT_MAX_ATTEMPTS:
+                event.subscribers = missing
+                if not self.alert_dispatcher.requeue(event, delay=5 * 2 ** event.attempts):
+                    ALERTS_DROPPED.inc()
+            else:
+                print(f"Giving up alert for camera {event.camera_id} after {self.ALERT_MAX_ATTEMPTS} attempts")
             
-        return (self.messages_in_minute < self.MAX_MESSAGES_PER_MINUTE and 
-                (now - self.last_sent_time).total_seconds() >= self.MIN_INTERVAL)
-        
+    def recorded_frames(self, event: AlertEvent):
+        """
+        Pre-roll/post-roll footage for the event from the camera's compressed ring buffer,
+        as (count, frames). Frames are decoded one at a time as the encoder consumes them.
+        """
+        if not self.recording_enabled:
+            return 0, []
+        start = event.frames[0]['timestamp'].timestamp() - self.PRE_ROLL
+        end = min(event.last_trigger_time + self.POST_ROLL, time.time())
+        count, recording = self.camera_manager.get_recording(event.camera_id, start, end)
+        return count, ({'frame': frame, 'timestamp': datetime.fromtimestamp(timestamp)}
+                       for timestamp, frame in recording)
+    
     def create_video_from_frames(self, frames, camera_id):
-        """Creates a video from frames with camera-specific naming."""
-        if not frames:
-            return None
-            
-        temp_video_path = f'temp_detection_cam_{camera_id}.mp4'
-        temp_avi_path = f'temp_detection_cam_{camera_id}.avi'
-        
-        height, width = frames[0]['frame'].shape[:2]
-        
-        try:
-            # Try MJPG first as it's widely supported
-            fourcc = cv2.VideoWriter_fourcc(*'MJPG')
-            
-            out = cv2.VideoWriter(
-                temp_avi_path,
-                fourcc,
-                self.VIDEO_FPS,
-                (width, height),
-                isColor=True
-            )
-            
-            if not out.isOpened():
-                # Fallback to more basic codec
-                out.release()
-                fourcc = cv2.VideoWriter_fourcc(*'XVID')
-                out = cv2.VideoWriter(
-                    temp_avi_path,
-                    fourcc,
-                    self.VIDEO_FPS,
-                    (width, height),
-                    isColor=True
-                )
-            
-            # Write frames with camera ID and timestamp
+        """Encode frames into an in-memory MP4 clip stamped with camera ID and timestamp."""
+        def stamped():
             for frame_data in frames:
+                # Stamp a copy: a requeued alert encodes the same frames again
                 frame = frame_data['frame'].copy()
+                height = frame.shape[0]
                 timestamp = frame_data['timestamp'].strftime('%Y-%m-%d %H:%M:%S')
-                # Add camera ID and timestamp to frame
                 cv2.putText(frame, f"Camera {camera_id} - {timestamp}", 
                            (10, height - 10), 
                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-                out.write(frame)
-            
-            out.release()
-            
-            # Convert to MP4
-            try:
-                mp4_fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-                out_mp4 = cv2.VideoWriter(
-                    temp_video_path,
-                    mp4_fourcc,
-                    self.VIDEO_FPS,
-                    (width, height),
-                    isColor=True
-                )
-                
-                cap = cv2.VideoCapture(temp_avi_path)
-                while True:
-                    ret, frame = cap.read()
-                    if not ret:
-                        break
-                    out_mp4.write(frame)
-                
-                cap.release()
-                out_mp4.release()
-                
-            except Exception as e:
-                print(f"Direct MP4 conversion failed for camera {camera_id}: {e}")
-                if self._has_ffmpeg():
-                    self._convert_with_ffmpeg(temp_avi_path, temp_video_path)
-                else:
-                    temp_video_path = temp_avi_path
-            
-            # Cleanup temporary AVI
-            if os.path.exists(temp_avi_path) and os.path.exists(temp_video_path) and temp_video_path != temp_avi_path:
-                os.remove(temp_avi_path)
-                
-            return temp_video_path
-            
+                yield frame
+        
+        try:
+            data = self.clip_encoder.encode(stamped())
         except Exception as e:
             print(f"Error creating video for camera {camera_id}: {e}")
-            for file in [temp_video_path, temp_avi_path]:
-                if os.path.exists(file):
-                    try:
-                        os.remove(file)
-                    except:
-                        pass
             return None
-    
-    def _has_ffmpeg(self):
-        """Check if ffmpeg is available."""
-        try:
-            subprocess.run(['ffmpeg', '-version'], 
-                         stdout=subprocess.PIPE, 
-                         stderr=subprocess.PIPE)
-            return True
-        except:
-            return False
+        if data is None:
+            return None
+        video = io.BytesIO(data)
+        video.name = f"detection_cam_{camera_id}.mp4"
+        return video
 
-    def _convert_with_ffmpeg(self, input_path, output_path):
-        """Convert video using ffmpeg."""
-        try:
-            subprocess.run([
-                'ffmpeg', '-i', input_path,
-                '-c:v', 'libx264',
-                '-preset', 'ultrafast',
-                '-pix_fmt', 'yuv420p',
-                output_path,
-                '-y'
-            ], check=True, capture_output=True)
-        except subprocess.CalledProcessError as e:
-            print(f"FFMPEG conversion failed: {e.stderr.decode()}")
-            raise
-        
-    def send_detection_message(self, subscribers, camera_id, detection_type='video'):
-        """Send detection message for a specific camera."""
-        buffer = self.get_or_create_buffer(camera_id)
+    def build_alert_media(self, event: AlertEvent, detection_type='video'):
+        """Encode an alert as (kind, media, caption), with kind 'video' or 'photo'."""
+        camera_id = event.camera_id
+        frames = event.frames
+        buffer_size = len(frames)
+        if event.trace is not None:
+            event.trace.mark("encode_start")
+        time_span = (frames[-1]['timestamp'] - 
+                    frames[0]['timestamp']).total_seconds()
         
-        if not buffer:
-            return
+        base_caption = (f"⚠️ Detección de intrusión - Cámara {camera_id}\n"
+                      f"👤 {buffer_size} personas nuevas en {time_span:.1f} segundos\n"
+                      f"🕒 Última detección: {frames[-1]['timestamp'].strftime('%H:%M:%S')}")
 
-        try:
-            with self.buffer_locks[camera_id]:
-                buffer_size = len(buffer)
-                if buffer_size < 2:  # Need at least 2 frames for meaningful time span
-                    return
-                    
-                time_span = (buffer[-1]['timestamp'] - 
-                            buffer[0]['timestamp']).total_seconds()
-                
-                base_caption = (f"⚠️ Detección de intrusión - Cámara {camera_id}\n"
-                              f"📸 {buffer_size} detecciones en {time_span:.1f} segundos\n"
-                              f"🕒 Última detección: {buffer[-1]['timestamp'].strftime('%H:%M:%S')}")
+        if detection_type == 'video':
+            # Prefer the continuous recording; fall back to the annotated detection frames
+            count, clip_frames = self.recorded_frames(event)
+            if count < self.VIDEO_THRESHOLD:
+                count, clip_frames = len(frames), frames
+            if count >= self.VIDEO_THRESHOLD:
+                start = time.perf_counter()
+                media = self.create_video_from_frames(clip_frames, camera_id)
+                if media is not None:
+                    ALERT_ENCODE_SECONDS.labels('video').observe(time.perf_counter() - start)
+                    self.mark_encoded(event)
+                    return 'video', media, f"{base_caption}\n🎥 Video de la secuencia"
 
-                with self.send_lock:
-                    if not self.can_send_message():
-                        return
+        # Send latest image if not enough frames for video
+        start = time.perf_counter()
+        ok, jpeg = cv2.imencode('.jpg', frames[-1]['frame'])
+        if not ok:
+            return None
+        ALERT_ENCODE_SECONDS.labels('photo').observe(time.perf_counter() - start)
+        self.mark_encoded(event)
+        media = io.BytesIO(jpeg.tobytes())
+        media.name = f"detection_cam_{camera_id}.jpg"
+        return 'photo', media, f"{base_caption}\n📸 Imagen instantánea"
 
-                    if detection_type == 'video' and buffer_size >= self.VIDEO_THRESHOLD:
-                        # Create and send video
-                        video_path = self.create_video_from_frames(list(buffer), camera_id)
-                        if video_path:
-                            with open(video_path, 'rb') as video:
-                                for subscriber in subscribers:
-                                    try:
-                                        self.bot.send_video(subscriber, video, 
-                                                          caption=f"{base_caption}\n🎥 Video de la secuencia")
-                                        self.messages_in_minute += 1
-                                        self.last_sent_time = datetime.now()
-                                    except Exception as e:
-                                        print(f"Error sending video from camera {camera_id} to {subscriber}: {e}")
-                            os.remove(video_path)
-                    else:
-                        # Send latest image if not enough frames for video
-                        latest_frame = buffer[-1]['frame']
-                        temp_path = f'temp_detection_cam_{camera_id}.jpg'
-                        cv2.imwrite(temp_path, latest_frame)
-                        
-                        with open(temp_path, 'rb') as photo:
-                            for subscriber in subscribers:
-                                try:
-                                    self.bot.send_photo(subscriber, photo, 
-                                                      caption=f"{base_caption}\n📸 Imagen instantánea")
-                                    self.messages_in_minute += 1
-                                    self.last_sent_time = datetime.now()
-                                except Exception as e:
-                                    print(f"Error sending photo from camera {camera_id} to {subscriber}: {e}")
-                        os.remove(temp_path)
-                    
-                    # Clear buffer after sending
-                    buffer.clear()
+    def send_detection_message(self, subscribers, event: AlertEvent, detection_type='video'):
+        """Send detection message for a specific camera. Returns the subscribers reached."""
+        if not event.frames:
+            return list(subscribers)
+        try:
+            alert = self.build_alert_media(event, detection_type)
+            if alert is None:
+                return []
+            kind, media, caption = alert
+            self.mark_sending([event])
+            start = time.perf_counter()
+            if kind == 'video':
+                delivered = self.fanout.send_video(subscribers, media, caption)
+            else:
+                delivered = self.fanout.send_photo(subscribers, media, caption)
+            self.record_send(kind, start, delivered)
+            return delivered
+        except Exception as e:
+            print(f"Error in send_detection_message for camera {event.camera_id}: {e}")
+            return []
 
+    def send_grouped_message(self, subscribers, events):
+        """Send near-simultaneous detections from several cameras as one media album."""
+        try:
+            alerts = [(event, self.build_alert_media(event)) for event in events if event.frames]
+            alerts = [(event, alert) for event, alert in alerts if alert is not None]
+            if not alerts:
+                return []
+            cameras = ", ".join(str(event.camera_id) for event, _ in alerts)
+            lines = [f"📷 Cámara {event.camera_id}: {len(event.frames)} personas nuevas, "
+                     f"última {event.frames[-1]['timestamp'].strftime('%H:%M:%S')}"
+                     for event, _ in alerts]
+            caption = f"⚠️ Detección de intrusión - Cámaras {cameras}\n" + "\n".join(lines)
+            items = [(kind, media) for _, (kind, media, _) in alerts]
+            self.mark_sending(events)
+            start = time.perf_counter()
+            delivered = self.fanout.send_album(subscribers, items, caption)
+            self.record_send('album', start, delivered)
+            return delivered
         except Exception as e:
-            print(f"Error in send_detection_message for camera {camera_id}: {e}")
+            print(f"Error in send_grouped_message: {e}")
+            return []
+
+    def mark_encoded(self, event):
+        if event.trace is not None:
+            event.trace.mark("encode_end")
+
+    def mark_sending(self, events):
+        now = time.time()
+        for event in events:
+            if event.trace is not None:
+                event.trace.mark("send_start", now)
+
+    def build_latency_message(self):
+        """Average time per pipeline stage and camera, from capture to delivery."""
+        breakdown = TRACER.breakdown()
+        if not breakdown:
+            return "Todavía no hay mediciones de latencia."
+        lines = ["⏱️ Latencia promedio por etapa (ms)"]
+        for camera_id, stages in sorted(breakdown.items(), key=lambda item: int(item[0])):
+            parts = ", ".join(f"{stage} {seconds * 1000:.0f}" for stage, seconds, _ in stages)
+            lines.append(f"Cámara {camera_id}: {parts}")
+        slowest = TRACER.slowest_alerts()
+        if slowest:
+            lines.append(f"Alerta más lenta: cámara {slowest[0]['camera']}, {slowest[0]['total_ms'] / 1000:.1f} s")
+        return "\n".join(lines)
+
+    def build_health_message(self):
+        """Supervisor state of every camera: streaming, stalled, backing off or failed."""
+        health = self.camera_processor.supervisor.health() if self.camera_processor is not None else {}
+        if not health:
+            return "No hay cámaras supervisadas."
+        icons = {"streaming": "🟢", "connecting": "🔄", "stalled": "🟡", "backoff": "🟠", "failed": "🔴"}
+        lines = ["🩺 Estado de las cámaras"]
+        for cam_index, camera in health.items():
+            line = f"{icons.get(camera['state'], '')} Cámara {cam_index}: {camera['state']} hace {camera['for_seconds']:.0f} s"
+            if camera["frame_age"] is not None:
+                line += f", último frame hace {camera['frame_age']:.1f} s"
+            if camera["retry_in"] is not None:
+                line += f", {camera['failures']} fallos, reintento en {camera['retry_in']:.0f} s"
+            if camera["reconnects"]:
+                line += f", {camera['reconnects']} reconexiones"
+            if camera["state"] != "streaming" and camera["last_error"]:
+                line += f" ({camera['last_error']})"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def record_send(self, kind, start, delivered):
+        ALERT_SEND_SECONDS.labels(kind).observe(time.perf_counter() - start)
+        if delivered:
+            ALERTS_SENT.labels(kind).inc()
+
+    def build_stats_message(self):
+        """Pipeline summary from the metrics registry; rates cover the time since the previous call."""
+        def samples(name):
+            metric = REGISTRY.get(name)
+            return dict(metric.samples()) if metric is not None else {}
+
+        def values(name):
+            return {labels: child.get() for labels, child in samples(name).items()}
+
+        def milliseconds(child, q):
+            value = child.quantile(q) if child is not None else None
+            return "-" if value is None else f"≤{value * 1000:.0f} ms"
+
+        now = time.time()
+        counters = {name: values(name) for name in ("sentinel_frames_decoded", "sentinel_camera_inferences",
+                                                    "sentinel_alerts_triggered", "sentinel_alerts_sent")}
+        previous_time, previous = self.last_stats
+        self.last_stats = (now, counters)
+        elapsed = max(now - previous_time, 1e-6)
+
+        def rate(name, labels):
+            return (counters[name].get(labels, 0) - previous.get(name, {}).get(labels, 0)) / elapsed
+
+        rates = values("sentinel_inference_rate_hz")
+        tracks = values("sentinel_active_tracks")
+        lines = [f"📊 Estadísticas de los últimos {elapsed:.0f} s"]
+        for labels in sorted(counters["sentinel_frames_decoded"], key=lambda labels: int(labels[0])):
+            lines.append(f"Cámara {labels[0]}: {rate('sentinel_frames_decoded', labels):.1f} fps, "
+                         f"{rate('sentinel_camera_inferences', labels):.1f} inf/s "
+                         f"(objetivo {rates.get(labels, 0):.1f} Hz), {tracks.get(labels, 0)} tracks, "
+                         f"{counters['sentinel_alerts_triggered'].get(labels, 0)} alertas")
+
+        inference = samples("sentinel_inference_seconds").get(())
+        batch = samples("sentinel_inference_batch_size").get(())
+        _, batch_sum, batch_count = batch.get() if batch is not None else ([], 0, 0)
+        queue = values("sentinel_inference_queue_depth").get((), 0)
+        lines.append(f"Inferencia: p50 {milliseconds(inference, 0.5)}, p95 {milliseconds(inference, 0.95)}, "
+                     f"batch medio {batch_sum / batch_count if batch_count else 0:.1f}, cola {queue}")
+
+        sent = sum(counters["sentinel_alerts_sent"].values())
+        send_times = ", ".join(f"{labels[0]} p95 {milliseconds(child, 0.95)}"
+                               for labels, child in sorted(samples("sentinel_alert_send_seconds").items()))
+        lines.append(f"Alertas: {sent} enviadas, cola {self.alert_dispatcher.qsize()}, "
+                     f"descartadas {self.alert_dispatcher.stats()['dropped']}"
+                     + (f", envío {send_times}" if send_times else ""))
+        return "\n".join(lines)
+
+    def snapshot_media(self, camera_number):
+        """Cached JPEG of the camera's newest frame as an uploadable file, or None"""
+        quality = self.memory_data.config.get("snapshot.quality", 85)
+        data, _ = self.camera_manager.get_snapshot(camera_number, quality)
+        if data is None:
+            return None
+        media = io.BytesIO(data)
+        media.name = f"snapshot_cam_{camera_number}.jpg"
+        return media
 
     def is_authorized(self, subcriber_id):
         subscribers = self.get_subscribers()
         return subcriber_id in subscribers
 
     def get_subscribers(self):
-        return self.memory_data.get_nested("bot.subscribers") or []  # Return empty list if None
+        return list(self.subscribers)  # Copy of the current snapshot; empty list if None
     
     def get_chat_id(self, message):
         if message.chat.type in ['group', 'supergroup']:
@@ -282,7 +391,7 @@ class TelegramBot:
                 return
 
             # Verificar si el número de serie está autorizado
-            authorized_sn = self.memory_data.get("sn") or []
+            authorized_sn = self.memory_data.config.get("sn", ())
             if serial_number in authorized_sn:
                 # Verificar si el suscriptor ya está en la lista
                 if not self.is_authorized(subcriber_id):
@@ -302,7 +411,7 @@ class TelegramBot:
 
             if self.is_authorized(subcriber_id):
                 # Si el mensaje viene de un grupo, responder en el grupo y avisar quien fue el que activo al bot
-                self.model_inference.infer_activated = True
+                # ModelInference picks the change up through its config subscription
                 self.memory_data.set_nested("inference.activated.status", True)
                 if message.chat.type in ['group', 'supergroup']:
                     self.bot.reply_to(message, f"{message.from_user.first_name} ha activado al Sentinela.")
@@ -357,7 +466,7 @@ class TelegramBot:
             subcriber_id = self.get_chat_id(message)
 
             if self.is_authorized(subcriber_id):
-                status = self.memory_data.get_nested("inference.activated.status")
+                status = self.model_inference.infer_activated
                 self.bot.reply_to(message, f"Estado de la inferencia: {'Activado' if status else 'Desactivado'}")
         
         @self.bot.message_handler(commands=['snapshot'])
@@ -374,19 +483,12 @@ class TelegramBot:
                     
                     camera_number = int(command_parts[1])
                     
-                    # Get the frame from the camera
-                    frame = self.camera_manager.get_camera_frame(camera_number)
+                    # Newest frame from the grabber's slot, JPEG-encoded once per frame
+                    photo = self.snapshot_media(camera_number)
                     
-                    if frame is not None:
-                        # Save the frame as an image
-                        temp_path = f'temp_snapshot_cam_{camera_number}.jpg'
-                        cv2.imwrite(temp_path, frame)
-                        
-                        # Send the image
-                        with open(temp_path, 'rb') as photo:
-                            self.bot.send_photo(subscriber_id, photo, 
-                                                caption=f"📸 Snapshot from Camera {camera_number}")
-                        os.remove(temp_path)
+                    if photo is not None:
+                        self.bot.send_photo(subscriber_id, photo, 
+                                            caption=f"📸 Snapshot from Camera {camera_number}")
                     else:
                         self.bot.reply_to(message, f"Error fetching frame from camera {camera_number}")
                         
@@ -395,6 +497,32 @@ class TelegramBot:
             else:
                 self.bot.reply_to(message, "No estás autorizado para usar este bot.")        
             
+        @self.bot.message_handler(commands=['snapshot_all'])
+        def snapshot_all_command(message):
+            subscriber_id = self.get_chat_id(message)
+            if self.is_authorized(subscriber_id):
+                try:
+                    cameras = sorted(self.camera_manager.frame_slots)
+                    photos = [(camera_number, self.snapshot_media(camera_number)) for camera_number in cameras]
+                    photos = [(camera_number, photo) for camera_number, photo in photos if photo is not None]
+                    if not photos:
+                        self.bot.reply_to(message, "No hay frames disponibles de ninguna cámara.")
+                        return
+                    # Telegram albums take between 2 and 10 items
+                    for i in range(0, len(photos), self.ALBUM_MAX_ITEMS):
+                        chunk = photos[i:i + self.ALBUM_MAX_ITEMS]
+                        if len(chunk) == 1:
+                            camera_number, photo = chunk[0]
+                            self.bot.send_photo(subscriber_id, photo, caption=f"📸 Cámara {camera_number}")
+                        else:
+                            self.bot.send_media_group(subscriber_id, [
+                                InputMediaPhoto(photo, caption=f"📸 Cámara {camera_number}")
+                                for camera_number, photo in chunk])
+                except Exception as e:
+                    self.bot.reply_to(message, f"Error processing snapshot command: {e}")
+            else:
+                self.bot.reply_to(message, "No estás autorizado para usar este bot.")
+
         @self.bot.message_handler(commands=['active_cams'])
         def active_cams_command(message):
             subcriber_id = self.get_chat_id(message)
@@ -410,6 +538,14 @@ class TelegramBot:
             else:
                 self.bot.reply_to(message, "No estás autorizado para usar este bot.")
 
+        @self.bot.message_handler(commands=['cam_health'])
+        def cam_health_command(message):
+            subcriber_id = self.get_chat_id(message)
+            if self.is_authorized(subcriber_id):
+                self.bot.reply_to(message, self.build_health_message())
+            else:
+                self.bot.reply_to(message, "No estás autorizado para usar este bot.")
+
         
         # Comando para modificar el threshold de inferencia
         @self.bot.message_handler(commands=['set_criteria'])
@@ -421,7 +557,6 @@ class TelegramBot:
                     threshold = float(message.text.split(' ')[1])
                     # max should be 1 and min should be 0
                     if 0 <= threshold <= 1:
-                        self.model_inference.infer_threshold = threshold
                         self.memory_data.set_nested("inference.threshold", threshold)
                         self.bot.reply_to(message, f"Threshold de detección actualizado a {threshold}")
                     else:
@@ -437,24 +572,156 @@ class TelegramBot:
             subcriber_id = self.get_chat_id(message)
             
             if self.is_authorized(subcriber_id):
-                mem_gpu = 0
-                current, peak = tracemalloc.get_traced_memory()
-                torch_mem = torch.cuda.memory_allocated() if torch.cuda.is_available() else 0
-                mem_cpu_current = current / 1e6  # Convert to MB
-                mem_cpu_peak = peak / 1e6  # Convert to MB
+                # RSS always; Python allocations only while a /profile window has tracemalloc on
+                stats = process_stats()
+                traced = ""
+                if tracemalloc.is_tracing():
+                    current, peak = tracemalloc.get_traced_memory()
+                    traced = (f"Memoria Python (tracemalloc): {current / 1e6:.2f} MB\n"
+                              f"Pico Python (tracemalloc): {peak / 1e6:.2f} MB\n")
                 mem_gpu = 0
                 gpu_name = "CPU"
-                if torch.cuda.is_available():
+                # torch is only loaded with the PyTorch backend; the exported ones run without it
+                torch = sys.modules.get("torch")
+                if torch is not None and torch.cuda.is_available():
                     mem_gpu = torch.cuda.memory_allocated() / 1e9
                     gpu_name = torch.cuda.get_device_name()
-                elif torch.backends.mps.is_available():
+                elif torch is not None and torch.backends.mps.is_available():
                     mem_gpu = torch.cuda.memory_allocated() / 1e9
                     gpu_name = "MPS"
                 self.bot.reply_to(message, 
                                   f"Inference processor: {gpu_name}\n"
                                   f"Malloc GPU: {mem_gpu:.2f} GB\n"
-                                  f"Uso de memoria ram: {mem_cpu_current:.2f} MB\n"
-                                  f"Pico de uso de memoria ram: {mem_cpu_peak:.2f} MB\n")
+                                  f"Uso de memoria ram (RSS): {stats['rss_mb']:.2f} MB\n"
+                                  f"Memoria virtual: {stats['vms_mb']:.2f} MB\n"
+                                  f"Hilos: {stats['threads']}\n"
+                                  f"{traced}")
+                
+        @self.bot.message_handler(commands=['motion_stats'])
+        def motion_stats_command(message):
+            subcriber_id = self.get_chat_id(message)
+            if self.is_authorized(subcriber_id):
+                if self.camera_processor is None:
+                    self.bot.reply_to(message, "Estadísticas de movimiento no disponibles.")
+                    return
+                stats = self.camera_processor.get_motion_stats()
+                if stats:
+                    lines = [f"Cámara {cam_index}: {s['hits']} con movimiento, "
+                             f"{s['misses']} sin movimiento, {s['forced']} forzadas"
+                             for cam_index, s in sorted(stats.items())]
+                    self.bot.reply_to(message, "Filtro de movimiento:\n" + "\n".join(lines))
+                else:
+                    self.bot.reply_to(message, "No hay cámaras activas en este momento.")
+            else:
+                self.bot.reply_to(message, "No estás autorizado para usar este bot.")
+                
+        @self.bot.message_handler(commands=['stats'])
+        def stats_command(message):
+            subcriber_id = self.get_chat_id(message)
+            if self.is_authorized(subcriber_id):
+                self.bot.reply_to(message, self.build_stats_message())
+            else:
+                self.bot.reply_to(message, "No estás autorizado para usar este bot.")
+
+        @self.bot.message_handler(commands=['latency'])
+        def latency_command(message):
+            subcriber_id = self.get_chat_id(message)
+            if self.is_authorized(subcriber_id):
+                self.bot.reply_to(message, self.build_latency_message())
+            else:
+                self.bot.reply_to(message, "No estás autorizado para usar este bot.")
+
+        @self.bot.message_handler(commands=['trace_dump'])
+        def trace_dump_command(message):
+            subcriber_id = self.get_chat_id(message)
+            if self.is_authorized(subcriber_id):
+                path = f"latency_trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+                try:
+                    TRACER.dump(path)
+                    with open(path, 'rb') as document:
+                        self.bot.send_document(subcriber_id, document,
+                                               caption=f"⏱️ {len(TRACER.slowest_alerts())} alertas más lentas")
+                except Exception as e:
+                    self.bot.reply_to(message, f"Error generando el volcado de latencias: {e}")
+            else:
+                self.bot.reply_to(message, "No estás autorizado para usar este bot.")
+
+        @self.bot.message_handler(commands=['profile'])
+        def profile_command(message):
+            subcriber_id = self.get_chat_id(message)
+            if self.is_authorized(subcriber_id):
+                command_parts = message.text.split()
+                try:
+                    seconds = float(command_parts[1]) if len(command_parts) > 1 else PROFILER.seconds
+                except ValueError:
+                    self.bot.reply_to(message, "Uso: /profile [segundos]")
+                    return
+                seconds = min(max(seconds, 1), 300)
+
+                def send_profile(path, error):
+                    if error is not None:
+                        self.bot.send_message(subcriber_id, f"Error generando el perfil: {error}")
+                        return
+                    with open(path, 'rb') as document:
+                        self.bot.send_document(subcriber_id, document, caption="🔬 Perfil de CPU y memoria")
+
+                if PROFILER.start(seconds, on_done=send_profile):
+                    self.bot.reply_to(message, f"Perfilando durante {seconds:.0f} s...")
+                else:
+                    self.bot.reply_to(message, "Ya hay un perfil en curso.")
+            else:
+                self.bot.reply_to(message, "No estás autorizado para usar este bot.")
+
+        @self.bot.message_handler(commands=['zone'])
+        def zone_command(message):
+            subcriber_id = self.get_chat_id(message)
+            if self.is_authorized(subcriber_id):
+                command_parts = message.text.split()
+                try:
+                    camera_number = int(command_parts[1])
+                    polygon = parse_polygon(command_parts[2:])
+                except (IndexError, ValueError) as e:
+                    self.bot.reply_to(message, "Uso: /zone <camera_number> x,y x,y x,y ... "
+                                               f"(coordenadas entre 0 y 1)\n{e}")
+                    return
+                zones = [[list(point) for point in zone]
+                         for zone in self.memory_data.config.get(f"zones.{camera_number}", ())]
+                zones.append(polygon)
+                self.memory_data.set_nested(f"zones.{camera_number}", zones)
+                self.bot.reply_to(message, f"Zona agregada a la cámara {camera_number} ({len(zones)} en total).")
+            else:
+                self.bot.reply_to(message, "No estás autorizado para usar este bot.")
+
+        @self.bot.message_handler(commands=['zone_clear'])
+        def zone_clear_command(message):
+            subcriber_id = self.get_chat_id(message)
+            if self.is_authorized(subcriber_id):
+                try:
+                    camera_number = int(message.text.split()[1])
+                except (IndexError, ValueError):
+                    self.bot.reply_to(message, "Uso: /zone_clear <camera_number>")
+                    return
+                self.memory_data.set_nested(f"zones.{camera_number}", [])
+                self.bot.reply_to(message, f"Zonas de la cámara {camera_number} eliminadas: se vigila el cuadro completo.")
+            else:
+                self.bot.reply_to(message, "No estás autorizado para usar este bot.")
+
+        @self.bot.message_handler(commands=['zones'])
+        def zones_command(message):
+            subcriber_id = self.get_chat_id(message)
+            if self.is_authorized(subcriber_id):
+                zones = self.memory_data.config.get("zones", {})
+                lines = []
+                for camera_number, polygons in sorted(zones.items(), key=lambda item: int(item[0])):
+                    for polygon in polygons:
+                        points = " ".join(f"{x:g},{y:g}" for x, y in polygon)
+                        lines.append(f"Cámara {camera_number}: {points}")
+                if lines:
+                    self.bot.reply_to(message, "Zonas de detección:\n" + "\n".join(lines))
+                else:
+                    self.bot.reply_to(message, "No hay zonas configuradas: se vigila el cuadro completo.")
+            else:
+                self.bot.reply_to(message, "No estás autorizado para usar este bot.")
                 
         @self.bot.message_handler(commands=['help'])
         def help_command(message):
@@ -466,14 +733,30 @@ class TelegramBot:
                                          "/deactivate - Desactiva el sentinela\n"
                                          "/set - Setea el número de serie de tu sentinela\n"
                                          "/snapshot <camera_number> - Get an instant picture from a specific camera\n"
+                                         "/snapshot_all - Foto actual de todas las cámaras en un álbum\n"
                                          "/active_cams - Get the list of active cameras\n"
+                                         "/cam_health - Estado de conexión de cada cámara\n"
                                          "/inference_status - Muestra el estado de la inferencia\n"
                                          "/remove - Desuscribirse de las notificaciones\n"
                                          "/suscriptors - Lista los suscriptores actuales\n"
                                          "/mem_stat - Muestra el estado de la memoria\n"
+                                         "/motion_stats - Muestra los contadores del filtro de movimiento\n"
+                                         "/stats - Muestra fps, inferencias y alertas por cámara\n"
+                                         "/latency - Latencia promedio por etapa y cámara\n"
+                                         "/trace_dump - Envía un archivo con las alertas más lentas\n"
+                                         "/profile [segundos] - Perfila CPU y memoria y envía el reporte\n"
                                          "/set_criteria X - Setea el threshold de detección (0-1)\n"
+                                         "/zone <camera_number> x,y x,y x,y ... - Agrega una zona de detección (coordenadas 0-1)\n"
+                                         "/zone_clear <camera_number> - Elimina las zonas de una cámara\n"
+                                         "/zones - Lista las zonas de detección\n"
                                          "/help - Mostrar los comandos disponibles\n"
                                          "/stop - Detener el bot")
 
     def start(self):
+        self.alert_dispatcher.start()
         self.bot.infinity_polling()
+
+    def stop(self):
+        self.bot.stop_polling()
+        self.alert_dispatcher.stop()
+        self.fanout.shutdown()
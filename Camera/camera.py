@@ -1,14 +1,49 @@
 import cv2
 import numpy as np
 import threading
+from time import time
+from grabber import FrameGrabber, LatestFrame, open_capture
+from shm import ProcessGrabber
+from recorder import FrameRecorder
+from Monitoring.metrics import REGISTRY
+
+CAMERA_CONNECTS = REGISTRY.counter("sentinel_camera_connects", "Camera (re)initialization attempts", ["camera", "result"])
+CAMERA_UP = REGISTRY.gauge("sentinel_camera_up", "1 while the camera's grabber is streaming", ["camera"])
+SNAPSHOT_REQUESTS = REGISTRY.counter("sentinel_snapshot_requests", "Snapshots served, from the JPEG cache or freshly encoded",
+                                     ["camera", "result"])
+FRAME_AGE = REGISTRY.gauge("sentinel_frame_age_seconds", "Seconds since the camera's last decoded frame", ["camera"])
 
 class CameraManager:
-    def __init__(self):
+    def __init__(self, max_decode_fps=15, capture_mode="thread", ring_slots=4, recording=None,
+                 capture_factory=None, open_timeout_ms=5000, read_timeout_ms=5000):
         self.cams = []
         self.lock = threading.Lock()
-        
+        self.max_decode_fps = max_decode_fps
+        # "thread": grabber thread per camera; "process": capture worker process + shared-memory ring
+        self.capture_mode = capture_mode
+        self.ring_slots = ring_slots
+        self.grabbers = {}  # {cam_index: FrameGrabber}
+        self.frame_slots = {}  # {cam_index: LatestFrame}
+        # Compressed pre-event recording per camera; None disables it
+        self.recording = recording
+        self.recorders = {}  # {cam_index: FrameRecorder}
+        # Latest JPEG per camera, keyed by frame seq and quality: {cam_index: ((seq, quality), bytes)}
+        self.snapshots = {}
+        # Builds the capture for a URL; benchmarks swap in synthetic sources
+        self.capture_factory = capture_factory or self.open_capture
+        # Bounds on opening a stream and on each read, so a dead channel fails fast
+        self.open_timeout_ms = open_timeout_ms
+        self.read_timeout_ms = read_timeout_ms
+
+    def build_url(self, cam_index, user, password, ip, port, protocol):
+        return f"{protocol}://{user}:{password}@{ip}:{port}/cam/realmonitor?channel={cam_index}&subtype=0"
+
+    def open_capture(self, url):
+        return open_capture(url, self.open_timeout_ms, self.read_timeout_ms)
+
     def initialize_camera(self, cam_index, user, password, ip, port, protocol):
-        cap = cv2.VideoCapture(f"{protocol}://{user}:{password}@{ip}:{port}/cam/realmonitor?channel={cam_index}&subtype=0")
+        url = self.build_url(cam_index, user, password, ip, port, protocol)
+        cap = self.capture_factory(url)
         cap.set(cv2.CAP_PROP_FPS, 30)
         cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
         cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
@@ -20,58 +55,150 @@ class CameraManager:
                 if self.is_black_screen(frame):
                     print(f"Pantalla negra detectada en la cámara {cam_index}.")
                     cap.release()
+                    CAMERA_CONNECTS.labels(cam_index, "black_screen").inc()
                     return False
                 else:
-                    # Ensure the cams list has enough elements
-                    while len(self.cams) < cam_index:
-                        self.cams.append(None)
-                    self.cams[cam_index - 1] = cap
+                    self.stop_grabber(cam_index)
+                    if self.capture_mode == "process":
+                        # The probe only validated the stream; decoding moves to a worker process
+                        cap.release()
+                        cap = self.start_process_grabber(cam_index, url, frame)
+                    with self.lock:
+                        # Ensure the cams list has enough elements
+                        while len(self.cams) < cam_index:
+                            self.cams.append(None)
+                        previous = self.cams[cam_index - 1]
+                        self.cams[cam_index - 1] = cap
+                    # A thread grabber releases its own capture once its loop exits, even if it is
+                    # still blocked in grab() past stop_grabber's join; only process grabbers are ours to release
+                    if isinstance(previous, ProcessGrabber) and previous is not cap:
+                        previous.release()
+                    if self.capture_mode != "process":
+                        self.start_grabber(cam_index, cap, frame)
                     print(f"Cámara {cam_index} inicializada correctamente")
+                    CAMERA_CONNECTS.labels(cam_index, "ok").inc()
                     return True
             else:
                 print(f"Error al capturar el frame de la cámara {cam_index}.")
                 cap.release()
+                CAMERA_CONNECTS.labels(cam_index, "no_frame").inc()
                 return False
         else:
             print(f"Error al iniciar la cámara {cam_index}")
             cap.release()
+            CAMERA_CONNECTS.labels(cam_index, "open_failed").inc()
             return False
-    
-    def release_cameras(self):
-        """Clean up resources"""
-        self.running = False
-        with self.lock:
-            for cam in self.cams:
-                if cam.isOpened():
-                    cam.release()
-        # Wait for buffer threads to finish
-        for thread in self.buffer_threads.values():
-            thread.join(timeout=1.0)
-            
+
+    def get_frame_slot(self, cam_index):
+        """Latest-frame slot of a camera, created with its recorder on first use"""
+        slot = self.frame_slots.get(cam_index)
+        if slot is None:
+            slot = self.frame_slots[cam_index] = LatestFrame()
+            CAMERA_UP.labels(cam_index).set_function(lambda: int(self.is_streaming(cam_index)))
+            FRAME_AGE.labels(cam_index).set_function(lambda: time() - slot.timestamp)
+            if self.recording:
+                recorder = self.recorders[cam_index] = FrameRecorder(**self.recording)
+                slot.listeners.append(recorder.add)
+        return slot
+
+    def get_recording(self, cam_index, start, end):
+        """Frames recorded between start and end: (count, lazily decoded (timestamp, frame) pairs)"""
+        recorder = self.recorders.get(cam_index)
+        return recorder.clip(start, end) if recorder is not None else (0, iter(()))
+
+    def start_grabber(self, cam_index, cap, first_frame=None):
+        """Start the dedicated grabber thread that feeds the camera's latest-frame slot"""
+        self.stop_grabber(cam_index)
+        slot = self.get_frame_slot(cam_index)
+        if first_frame is not None:
+            slot.publish(first_frame, time())
+        grabber = FrameGrabber(cam_index, cap, slot, self.max_decode_fps)
+        self.grabbers[cam_index] = grabber
+        grabber.start()
+
+    def start_process_grabber(self, cam_index, url, first_frame):
+        """Decode the camera in its own process, handing frames over through shared memory"""
+        slot = self.get_frame_slot(cam_index)
+        slot.publish(first_frame, time())
+        grabber = ProcessGrabber(cam_index, url, first_frame.shape, slot, self.max_decode_fps,
+                                 self.ring_slots, self.open_timeout_ms, self.read_timeout_ms)
+        self.grabbers[cam_index] = grabber
+        grabber.start()
+        return grabber
+
+    def stop_grabber(self, cam_index):
+        grabber = self.grabbers.pop(cam_index, None)
+        if grabber is not None:
+            grabber.stop()
+            grabber.join(timeout=1.0)
+
+    def is_streaming(self, cam_index):
+        """True while the camera's grabber is running and the stream is open"""
+        grabber = self.grabbers.get(cam_index)
+        return grabber is not None and grabber.is_alive() and not grabber.failed
+
+    def get_latest_frame(self, cam_index):
+        """Return (frame, timestamp, seq) of the newest decoded frame"""
+        slot = self.frame_slots.get(cam_index)
+        if slot is None:
+            return None, 0.0, 0
+        return slot.get()
+
+    def wait_for_frame(self, cam_index, last_seq, timeout=1.0):
+        """Block until a frame newer than last_seq is available or timeout expires"""
+        slot = self.frame_slots.get(cam_index)
+        if slot is None:
+            return None, 0.0, last_seq
+        return slot.wait_newer(last_seq, timeout)
+
     def get_camera_frame(self, camera_number):
-        # This method should be implemented to return a frame from the specified camera
-        # You might need to adjust this based on how your camera system is set up
-        if 1 <= camera_number <= len(self.cams):
-            cap = self.get_camera(camera_number - 1)
-            if cap and cap.isOpened():
-                ret, frame = cap.read()
-                if ret:
-                    return frame
-        return None
-        
+        """Return the newest frame of a camera without touching its capture device"""
+        frame, _, _ = self.get_latest_frame(camera_number)
+        return frame
+
+    def get_snapshot(self, cam_index, quality=85):
+        """
+        JPEG bytes and timestamp of the newest frame, encoded at most once per
+        frame version, so repeated requests neither re-encode nor touch the capture
+        """
+        frame, timestamp, seq = self.get_latest_frame(cam_index)
+        if frame is None:
+            return None, 0.0
+        key = (seq, quality)
+        cached = self.snapshots.get(cam_index)
+        if cached is not None and cached[0] == key:
+            SNAPSHOT_REQUESTS.labels(cam_index, "hit").inc()
+            return cached[1], timestamp
+        ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            return None, 0.0
+        data = jpeg.tobytes()
+        self.snapshots[cam_index] = (key, data)
+        SNAPSHOT_REQUESTS.labels(cam_index, "encoded").inc()
+        return data, timestamp
+
     def is_black_screen(self, frame):
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         _, thresh = cv2.threshold(gray, 10, 255, cv2.THRESH_BINARY)
         total_pixels = thresh.size
         black_pixels = np.count_nonzero(thresh == 0)
         return (black_pixels / total_pixels) * 100 > 80
-            
+
     def get_camera(self, index):
         with self.lock:  # Asegurar el acceso sincronizado a self.cams
             return self.cams[index] if index < len(self.cams) else None
 
     def release_cameras(self):
+        """Clean up resources"""
+        # Each grabber releases its capture when it stops; wait up to a read timeout
+        # for any still blocked in grab() so the captures are closed before exit
+        grabbers = [self.grabbers.pop(cam_index) for cam_index in list(self.grabbers)]
+        for grabber in grabbers:
+            grabber.stop()
+        deadline = time() + self.read_timeout_ms / 1000 + 1.0
+        for grabber in grabbers:
+            grabber.join(timeout=max(0.0, deadline - time()))
         with self.lock:  # Sincronizar la liberación de cámaras
             for cam in self.cams:
-                if cam.isOpened():
+                if isinstance(cam, ProcessGrabber) and cam.isOpened():
                     cam.release()
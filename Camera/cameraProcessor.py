@@ -1,32 +1,66 @@
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from camera import CameraManager
-from model import load_model
 from infer import ModelInference
-from utils import draw_boxes, show_frame, create_combined_frame
+from scheduler import InferenceScheduler
+from motion import MotionGate
+from rate import InferenceRateController
+from tracker import IoUTracker
+from zones import ZoneMask
+from preprocess import Letterbox, unletterbox_detections
+from display import DisplayCompositor
+from supervisor import CameraSupervisor
+from utils import extract_detections, offset_detections, draw_boxes, draw_tracks, create_combined_frame, DETECTION_DTYPE
+import numpy as np
 import Bot.telegram as telegram
-import cv2
-import tracemalloc
 import gc
-from Memory.memory import MemoryData
-from time import time
-import queue
+from Monitoring.metrics import REGISTRY, MetricsServer
+from Monitoring.tracing import TRACER, Trace
+from Monitoring.profiler import PROFILER
+from time import time, sleep
 import platform
 import threading
 
-# Monitorización de memoria
-tracemalloc.start()
+FRAMES_PROCESSED = REGISTRY.counter("sentinel_frames_processed", "Frames taken by the camera loop", ["camera"])
+FRAMES_SKIPPED = REGISTRY.counter("sentinel_frames_motion_skipped", "Frames dropped by the motion gate", ["camera"])
+INFERENCES = REGISTRY.counter("sentinel_camera_inferences", "Frames sent to inference", ["camera"])
+DETECTIONS = REGISTRY.counter("sentinel_detections", "People detected inside the camera's zones", ["camera"])
+ALERTS_TRIGGERED = REGISTRY.counter("sentinel_alerts_triggered", "New confirmed tracks that raised an alert", ["camera"])
+PROCESS_SECONDS = REGISTRY.histogram("sentinel_camera_process_seconds", "Camera loop time per inferred frame", ["camera"])
+INFERENCE_RATE = REGISTRY.gauge("sentinel_inference_rate_hz", "Current target inference rate", ["camera"])
+ACTIVE_TRACKS = REGISTRY.gauge("sentinel_active_tracks", "Tracks alive in the camera's tracker", ["camera"])
+CAMERA_READY_SECONDS = REGISTRY.gauge("sentinel_camera_ready_seconds", "Seconds from startup until the camera was streaming", ["camera"])
+MODEL_READY_SECONDS = REGISTRY.gauge("sentinel_model_ready_seconds", "Seconds from startup until the model was loaded and warmed up")
 
 class CameraProcessor:
-    def __init__(self, memory, model):
+    def __init__(self, memory, model, capture_factory=None):
+        """model may be a Future (see load_model_async): cameras are probed while it loads"""
+        self.startup_time = time()
         self.memory = memory
         self.model = model
-        self.frame_queues = {}
-        self.camera_manager = CameraManager()
-        self.model_inference = ModelInference(model, memory)
-        self.detection_counts = {}
-        self.detection_timeframes = {}
+        # capture_factory(url) replaces cv2.VideoCapture, e.g. with the benchmark's synthetic cameras
+        self.camera_manager = CameraManager(
+            max_decode_fps=memory.get_nested("capture.max_decode_fps") or 15,
+            capture_mode=memory.get_nested("capture.mode") or "thread",
+            ring_slots=memory.get_nested("capture.ring_slots") or 4,
+            recording=self.recording_settings(memory),
+            capture_factory=capture_factory,
+            open_timeout_ms=memory.get_nested("capture.open_timeout_ms") or 5000,
+            read_timeout_ms=memory.get_nested("capture.read_timeout_ms") or 5000,
+        )
+        self.model_inference = ModelInference(None if isinstance(model, Future) else model, memory)
+        config = memory.config
+        self.trackers = {}
+        self.motion_gates = {}
+        self.zones = {}  # {cam_index: ZoneMask}, None when the whole frame is watched
+        self.letterboxes = {}  # {cam_index: Letterbox} with the camera's preallocated model input
+        self.imgsz = memory.get_nested("inference.imgsz") or 640
         self.running = True
         self.active_cameras = []  # Track actually active cameras
+        self.metrics_server = None
+        self.display = None  # DisplayCompositor, only when display is enabled
+        self.camera_lock = threading.Lock()  # Serializes adding cameras found after startup
+        self.camera_executor = None  # Runs process_camera, set by start()
+        self.camera_futures = []
         
         # Initialize settings
         network_settings = memory.get("network_settings")
@@ -37,141 +71,392 @@ class CameraProcessor:
         self.protocol = network_settings['protocol']
         
         # Camera settings
-        self.NUM_CAMERAS = 8
-        self.detection_threshold = 3
-        self.detection_interval = 2
+        self.CHANNELS = memory.get_nested("capture.channels") or 7  # Probed channels: 1..CHANNELS
+        # Mosaic preview window; when disabled (servers, CI, benchmarks) no GUI code runs at all
+        self.display_enabled = self.get_display_enabled(config)
+        
+        # Per-camera tracker: one alert per person that stays in view for min_hits inferences
+        self.tracker_settings = self.get_tracker_settings(config)
+        
+        # Adaptive per-camera inference rate within a global budget
+        self.rate_controller = InferenceRateController(**self.get_rate_settings(config))
+        
+        # Motion gate settings
+        self.motion_enabled = config.get("motion.enabled") is not False
+        self.motion_settings = self.get_motion_settings(config)
+        self.apply_tracing_config(config)
+        self.apply_profiling_config(config)
         
         # Initialize component
         self.token = memory.get_nested("bot.token")
-        self.bot = telegram.TelegramBot(self.token, self.model_inference, self.camera_manager, memory)
+        self.bot = telegram.TelegramBot(self.token, self.model_inference, self.camera_manager, memory, camera_processor=self)
                 
-        # Thread synchronization
-        self.inference_lock = threading.Lock()
+        # Batched inference shared by all cameras
+        self.scheduler = InferenceScheduler(
+            self.model_inference,
+            max_batch_size=memory.get_nested("inference.batch.max_size") or 8,
+            max_wait_ms=memory.get_nested("inference.batch.max_wait_ms") or 10,
+        )
+        
+        # Reconnects dropped or stalled cameras in the background, with exponential backoff
+        self.supervisor = CameraSupervisor(self.camera_manager, self.connect_camera,
+                                           on_connected=self.on_camera_connected,
+                                           **self.get_supervisor_settings(config))
         
-        # Initialize cameras
-        self.initialize_cameras()
+        if isinstance(model, Future):
+            model.add_done_callback(self.on_model_loaded)
+        
+        # Later configuration changes (bot commands) apply without a restart
+        memory.subscribe(self.apply_config)
+        
+    def get_display_enabled(self, config):
+        return config.get("display.enabled") is not False and platform.system() != "Darwin"  # Skip display on MacOS
+    
+    def get_tracker_settings(self, config):
+        return {
+            "iou_threshold": config.get("tracking.iou_threshold", 0.3),
+            "min_hits": config.get("tracking.min_hits", 3),
+            "max_age": config.get("tracking.max_age", 2.0),
+            # Boxes are extrapolated at most one inference interval at the stable-track rate
+            "max_predict": 1.0 / max(config.get("inference.rate.tracking_hz", 2.0), 0.1),
+        }
+    
+    def get_rate_settings(self, config):
+        return {
+            "idle_hz": config.get("inference.rate.idle_hz", 1.0),
+            "active_hz": config.get("inference.rate.active_hz", 10.0),
+            "budget_hz": config.get("inference.rate.budget_hz", 20.0),
+            "active_hold": config.get("inference.rate.active_hold", 5.0),
+            "tracking_hz": config.get("inference.rate.tracking_hz", 2.0),
+        }
+    
+    def get_supervisor_settings(self, config):
+        return {
+            "stall_after": config.get("capture.reconnect.stall_seconds", 10.0),
+            "base_delay": config.get("capture.reconnect.base_delay", 1.0),
+            "max_delay": config.get("capture.reconnect.max_delay", 60.0),
+            "jitter": config.get("capture.reconnect.jitter", 0.3),
+            "fail_after": config.get("capture.reconnect.fail_after", 8),
+        }
+    
+    def get_motion_settings(self, config):
+        return {
+            "sensitivity": config.get("motion.sensitivity", 25),
+            "min_area": config.get("motion.min_area", 0.005),
+            "force_interval": config.get("motion.force_interval", 30),
+        }
+    
+    def apply_config(self, config):
+        """Push a new configuration snapshot into the running trackers, gates, rates and zones"""
+        self.tracker_settings = self.get_tracker_settings(config)
+        for tracker in list(self.trackers.values()):
+            for name, value in self.tracker_settings.items():
+                setattr(tracker, name, value)
+        self.motion_enabled = config.get("motion.enabled") is not False
+        self.motion_settings = self.get_motion_settings(config)
+        for gate in list(self.motion_gates.values()):
+            for name, value in self.motion_settings.items():
+                setattr(gate, name, value)
+        self.rate_controller.configure(**self.get_rate_settings(config))
+        for name, value in self.get_supervisor_settings(config).items():
+            setattr(self.supervisor, name, value)
+        self.apply_tracing_config(config)
+        self.apply_profiling_config(config)
+        if self.display is not None:
+            self.display.max_fps = config.get("display.max_fps", 10)
+        for cam_index in list(self.zones):
+            self.update_zones(cam_index, config)
+    
+    def apply_tracing_config(self, config):
+        TRACER.enabled = config.get("tracing.enabled") is not False
+        TRACER.slowest = config.get("tracing.slowest", 20)
+    
+    def apply_profiling_config(self, config):
+        PROFILER.seconds = config.get("profiling.seconds", 30)
+        PROFILER.interval = config.get("profiling.interval_ms", 10) / 1000
+        PROFILER.top = config.get("profiling.top", 20)
+        PROFILER.output_dir = config.get("profiling.output_dir") or "."
+    
+    def recording_settings(self, memory):
+        """FrameRecorder settings for the pre-event ring buffer, or None when disabled"""
+        if memory.get_nested("recording.enabled") is False:
+            return None
+        return {
+            "max_bytes": int((memory.get_nested("recording.max_mb") or 16) * 1024 * 1024),
+            "max_seconds": memory.get_nested("recording.seconds") or 15,
+            "record_fps": memory.get_nested("recording.fps") or 10,
+            "quality": memory.get_nested("recording.quality") or 70,
+        }
         
+    def on_model_loaded(self, future):
+        """Install the model once the background load and warm-up finish"""
+        try:
+            model = future.result()
+        except Exception as e:
+            print(f"Failed to load the model: {e}")
+            self.stop()
+            return
+        self.model = model
+        self.model_inference.set_model(model)
+        MODEL_READY_SECONDS.set(time() - self.startup_time)
+        print(f"Model ready after {time() - self.startup_time:.1f} s")
+    
+    def connect_camera(self, cam_index):
+        return self.camera_manager.initialize_camera(cam_index, self.user, self.password,
+                                                     self.ip, self.port, self.protocol)
+    
     def initialize_cameras(self):
-        """Initialize cameras and track which ones are actually active"""
-        for i in range(1, self.NUM_CAMERAS):
-            if self.camera_manager.initialize_camera(i, self.user, self.password, 
-                                                   self.ip, self.port, self.protocol):
-                self.frame_queues[i] = queue.Queue(maxsize=10)
-                self.detection_counts[i] = 0
-                self.detection_timeframes[i] = 0
-                self.active_cameras.append(i)
-                print(f"Camera {i} added to active cameras list")
-    
-    def infer_and_process(self, cam_index, frame):
-        """Process frame with model inference using thread-safe approach"""
-        with self.inference_lock:
-            try:
-                results = self.model_inference.infer(frame)
-                detected, boxes = draw_boxes(frame, 
-                                             results, 
-                                             self.detection_counts, 
-                                          self.detection_timeframes, 
-                                          self.model_inference.infer_threshold,
-                                          cam_index)
-                
-                current_time = time()
-                if detected:
-                    if ((current_time - self.detection_timeframes[cam_index] <= self.detection_interval) and 
-                        (self.detection_counts[cam_index] >= self.detection_threshold)):
-                        self.detection_counts[cam_index] = 0
-                        combined_frame = create_combined_frame(frame, boxes)
-                        self.bot.process_detection(combined_frame, cam_index)
-                    else:
-                        self.detection_counts[cam_index] += 1
-                
-                return frame
-            except Exception as e:
-                print(f"Error in inference for camera {cam_index}: {e}")
-                return frame
+        """
+        Probe all channels in parallel, each bounded by the capture timeouts. Each camera
+        starts processing as soon as it opens; the supervisor keeps retrying the rest.
+        """
+        channels = range(1, self.CHANNELS + 1)
+        with ThreadPoolExecutor(max_workers=len(channels), thread_name_prefix="camera-probe") as probes:
+            futures = {probes.submit(self.connect_camera, i): i for i in channels}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    opened = future.result()
+                except Exception as e:
+                    print(f"Error probing camera {i}: {e}")
+                    opened = False
+                self.supervisor.watch(i, opened)
+                if opened:
+                    self.on_camera_connected(i)
+    
+    def on_camera_connected(self, cam_index):
+        """Start processing a camera the first time its stream opens; reconnections reuse its loop"""
+        with self.camera_lock:
+            if cam_index in self.active_cameras or not self.running:
+                return
+            self.add_camera(cam_index)
+            print(f"Submitting camera {cam_index} for processing")
+            self.camera_futures.append(self.camera_executor.submit(self.process_camera, cam_index))
+    
+    def add_camera(self, cam_index):
+        """Create the per-camera pipeline state of a camera whose stream just opened"""
+        self.trackers[cam_index] = IoUTracker(**self.tracker_settings)
+        self.update_zones(cam_index)
+        self.letterboxes[cam_index] = Letterbox(self.imgsz)
+        self.motion_gates[cam_index] = MotionGate(**self.motion_settings)
+        self.rate_controller.register(cam_index)
+        self.register_camera_metrics(cam_index)
+        self.active_cameras.append(cam_index)
+        self.scheduler.set_sources(len(self.active_cameras))
+        CAMERA_READY_SECONDS.labels(cam_index).set(time() - self.startup_time)
+        print(f"Camera {cam_index} added to active cameras list after {time() - self.startup_time:.1f} s")
+    
+    def register_camera_metrics(self, cam_index):
+        """Gauges read from the live pipeline state when the metrics are scraped"""
+        INFERENCE_RATE.labels(cam_index).set_function(lambda: self.rate_controller.rates().get(cam_index, 0))
+        ACTIVE_TRACKS.labels(cam_index).set_function(lambda: len(self.trackers[cam_index].tracks))
+    
+    def frame_has_motion(self, cam_index, frame):
+        """Cheap pre-filter that decides whether a frame is worth running through the model"""
+        if not self.motion_enabled:
+            return True
+        gate = self.motion_gates[cam_index]
+        passed = gate.should_infer(frame)
+        if not passed:
+            FRAMES_SKIPPED.labels(cam_index).inc()
+        if gate.motion_detected:
+            # Motion from people already being tracked does not need the active rate
+            if self.trackers[cam_index].is_stable():
+                self.rate_controller.report_tracking(cam_index)
+            else:
+                self.rate_controller.report_activity(cam_index)
+        return passed
+    
+    def update_zones(self, cam_index, config=None):
+        """Reload the camera's detection zones (zones.<cam_index>) when they changed"""
+        config = config or self.memory.config
+        polygons = config.get(f"zones.{cam_index}")
+        current = self.zones.get(cam_index)
+        if current is not None and polygons == current.source:
+            return
+        self.zones[cam_index] = ZoneMask(polygons) if polygons else None
+    
+    def get_motion_stats(self):
+        """Per-camera motion gate hit/miss/forced counters"""
+        return {cam_index: gate.stats() for cam_index, gate in self.motion_gates.items()}
+    
+    def infer_and_process(self, cam_index, frame, trace=None):
+        """Run the frame through the shared batched inference scheduler and return its detections"""
+        try:
+            height, width = frame.shape[:2]
+            zone = self.zones.get(cam_index)
+            region, x1, y1 = frame, 0, 0
+            if zone is not None:
+                # Only the region around the zones goes through the model
+                x1, y1, x2, y2 = zone.crop_rect(width, height)
+                region = frame[y1:y2, x1:x2]
+            # A crop is never upscaled, so it costs the model fewer pixels than the full frame
+            tensor, letterbox = self.letterboxes[cam_index](region, scaleup=zone is None)
+            if trace is not None:
+                trace.mark("preprocessed")
+            results = self.scheduler.infer(cam_index, tensor, trace=trace)
+            detections = extract_detections(results, self.model_inference.infer_threshold)
+            detections = unletterbox_detections(detections, letterbox)
+            if zone is not None:
+                detections = zone.filter(offset_detections(detections, x1, y1), width, height)
+            
+            if len(detections):
+                DETECTIONS.labels(cam_index).inc(len(detections))
+            current_time = time()
+            tracker = self.trackers[cam_index]
+            confirmed = tracker.update(detections, current_time)
+            if tracker.has_tentative():
+                self.rate_controller.report_activity(cam_index, current_time)
+            elif tracker.tracks:
+                self.rate_controller.report_tracking(cam_index, current_time)
+            if trace is not None:
+                trace.mark("postprocessed")
+                TRACER.record_frame(trace)
+            
+            # Alert once per new track, not once per detection, from the full-resolution frame
+            if confirmed:
+                ALERTS_TRIGGERED.labels(cam_index).inc(len(confirmed))
+                annotated = frame.copy()  # The frame is shared with the grabber's slot
+                draw_boxes(annotated, detections)
+                for track in confirmed:
+                    x1, y1, x2, y2 = map(int, track.box.clip(0, [width, height, width, height]))
+                    detection = np.array([(x1, y1, x2, y2, track.conf, 0)], dtype=DETECTION_DTYPE)
+                    combined_frame = create_combined_frame(annotated, detection)
+                    self.bot.process_detection(combined_frame, cam_index,
+                                               trace=trace.copy() if trace is not None else None)
+            
+            return detections
+        except Exception as e:
+            print(f"Error in inference for camera {cam_index}: {e}")
+            return None
+    
+    def draw_overlay(self, cam_index, tile, scale):
+        """Draw where the tracker expects each person to be, and the zones, on the camera's mosaic tile"""
+        tracker = self.trackers.get(cam_index)
+        if tracker is not None:
+            draw_tracks(tile, tracker.predicted_boxes(time()), scale)
+        zone = self.zones.get(cam_index)
+        if zone is not None:
+            zone.draw(tile)
+    
+    def start_display(self):
+        """Start the compositor thread that shows every camera in one mosaic window"""
+        if not self.display_enabled:
+            return
+        config = self.memory.config
+        # One tile per channel, so cameras that connect later also show up
+        self.display = DisplayCompositor(
+            self.camera_manager, range(1, self.CHANNELS + 1),
+            tile_width=config.get("display.tile_width", 480),
+            tile_height=config.get("display.tile_height", 270),
+            max_fps=config.get("display.max_fps", 10),
+            overlay=self.draw_overlay,
+            on_quit=self.stop,
+        )
+        self.display.start()
     
     def process_camera(self, cam_index):
         """Process individual camera feed with proper error handling"""
         print(f"Starting processing for camera {cam_index}")
-        cam = self.camera_manager.get_camera(cam_index - 1)
-        if cam is None:
+        if self.camera_manager.get_camera(cam_index - 1) is None:
             print(f"Camera {cam_index} not available.")
             return
 
-        frame_count = 0
+        last_seq = 0
         last_processed_time = time()
-        zoom_level = 1.0
+        frames_processed = FRAMES_PROCESSED.labels(cam_index)
+        inferences = INFERENCES.labels(cam_index)
+        process_seconds = PROCESS_SECONDS.labels(cam_index)
         
         while self.running:
             try:
-                if not cam.isOpened():
-                    print(f"Camera {cam_index} is not open. Attempting to reinitialize...")
-                    self.camera_manager.initialize_camera(cam_index, self.user, self.password, self.ip, self.port, self.protocol)
-                    cam = self.camera_manager.get_camera(cam_index - 1)
-                    if cam is None:
-                        print(f"Failed to reinitialize camera {cam_index}. Exiting camera processing.")
-                        return
+                if not self.camera_manager.is_streaming(cam_index):
+                    # The supervisor reconnects in the background; wait for the stream without spinning
+                    sleep(0.5)
                     continue
 
-                ret, frame = cam.read()
-                if not ret:
-                    print(f"Failed to read frame from camera {cam_index}. Skipping this frame.")
+                # Newest frame published by the camera's grabber thread, at its native resolution
+                frame, captured_at, seq = self.camera_manager.wait_for_frame(cam_index, last_seq, timeout=1.0)
+                if frame is None:
                     continue
-
-                # Resize for memory optimization
-                frame_resized = cv2.resize(frame, (640, 480))
+                dequeued_at = time()
+                last_seq = seq
+                frames_processed.inc()
                 
-                # Proces every 2 fr
-                if frame_count % 2 == 0:
-                    frame_resized = self.infer_and_process(cam_index, frame_resized)
+                # Infer at the camera's current target rate, only when the motion gate lets the frame through
+                if (self.model_inference.infer_activated and self.model_inference.ready.is_set() and
+                        self.rate_controller.should_infer(cam_index) and
+                        self.frame_has_motion(cam_index, frame)):
                     last_processed_time = time()
-                    
-
-                # Reset frame count to prevent overflow
-                if frame_count >= 1000:
-                    frame_count = 0
-                                        
-                # Handle display based on platform
-                if platform.system() != "Darwin":  # Skip display on MacOS
-                    show_frame(frame_resized, cam_index)
-                    
-                    # Check for 'q' key to quit
-                    if cv2.waitKey(1) & 0xFF == ord('q'):
-                        self.running = False
-                        break
-                    
+                    self.rate_controller.mark_inferred(cam_index, last_processed_time)
+                    inferences.inc()
+                    trace = None
+                    if TRACER.enabled:
+                        trace = Trace(cam_index, captured_at)
+                        trace.mark("dequeued", dequeued_at)
+                    self.infer_and_process(cam_index, frame, trace)
+                    process_seconds.observe(time() - last_processed_time)
 
             except Exception as e:
                 print(f"Error processing camera {cam_index}: {e}")
-                time.sleep(1)  # Add a small delay before retrying
+                sleep(1)  # Add a small delay before retrying
             
         print(f"Camera {cam_index} processing stopped")
     
     def close_resources(self):
         """Properly clean up all resources"""
         self.running = False
+        self.supervisor.stop()
+        if self.display is not None:
+            self.display.stop()
+            self.display.join(timeout=2.0)
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        self.scheduler.stop()
+        self.bot.stop()
         self.camera_manager.release_cameras()
-        cv2.destroyAllWindows()
+        self.memory.close()  # Persist any pending configuration change
         gc.collect()
     
+    def stop(self):
+        """Ask every camera loop to finish; start() then releases the resources and returns"""
+        self.running = False
+    
+    def start_metrics_server(self):
+        """Serve the metrics registry in Prometheus text format on localhost"""
+        if self.memory.config.get("metrics.enabled") is False:
+            return
+        port = self.memory.config.get("metrics.port", 9108)
+        try:
+            self.metrics_server = MetricsServer(REGISTRY, "127.0.0.1", port).start()
+            print(f"Metrics available at http://127.0.0.1:{port}/metrics")
+        except OSError as e:
+            print(f"Could not start the metrics endpoint on port {port}: {e}")
+    
     def start(self):
         """Start processing with proper camera handling"""
         try:
-            with ThreadPoolExecutor(max_workers=len(self.active_cameras) + 1) as executor:
+            self.scheduler.start()
+            self.start_metrics_server()
+            with ThreadPoolExecutor(max_workers=self.CHANNELS + 1, thread_name_prefix="camera") as executor:
                 # Start Telegram bot
                 executor.submit(self.bot.start)
                 
-                # Start camera processing for active cameras only
-                camera_futures = []
+                # Each camera starts processing as soon as its stream opens, not after every channel is probed
+                self.camera_executor = executor
+                self.initialize_cameras()
                 print(f"Active cameras: {self.active_cameras}")
-                for cam_index in self.active_cameras:
-                    print(f"Submitting camera {cam_index} for processing")
-                    camera_futures.append(
-                        executor.submit(self.process_camera, cam_index)
-                    )
+                self.supervisor.start()
+                self.start_display()
                 
-                # Wait for all cameras to finish
-                for future in camera_futures:
+                # Cameras found later by the supervisor join while running; wait for stop()
+                while self.running:
+                    sleep(0.5)
+                for future in list(self.camera_futures):
                     future.result()
+                
+                # Stop polling too, otherwise the executor waits on the bot forever
+                self.bot.stop()
                     
         except Exception as e:
             print(f"Error in execution: {e}")
@@ -0,0 +1,101 @@
+import math
+import threading
+from time import time, sleep
+
+import cv2
+import numpy as np
+
+from Monitoring.metrics import REGISTRY
+
+DISPLAY_REFRESHES = REGISTRY.counter("sentinel_display_refreshes", "Mosaic refreshes shown by the display compositor")
+
+
+class DisplayCompositor(threading.Thread):
+    """
+    Único consumidor de la GUI: un hilo que arma con el último frame de cada
+    cámara un mosaico preasignado y lo muestra a lo sumo max_fps veces por
+    segundo. Las cámaras no dibujan ni llaman a HighGUI, y todas las llamadas
+    a cv2.imshow/waitKey quedan en este hilo. Cada celda se redimensiona solo
+    cuando su cámara publicó un frame nuevo.
+
+    overlay(cam_index, tile, scale) dibuja sobre la celda (cajas, zonas) y
+    on_quit() se llama al presionar 'q' en la ventana.
+    """
+    WINDOW_NAME = "Sentinel"
+    BACKGROUND = 32
+    STALE_AFTER = 2.0  # Segundos sin frames nuevos para marcar la celda
+
+    def __init__(self, camera_manager, cameras, tile_width=480, tile_height=270, max_fps=10,
+                 overlay=None, on_quit=None):
+        super().__init__(name="display-compositor", daemon=True)
+        self.camera_manager = camera_manager
+        self.cameras = list(cameras)
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.max_fps = max_fps
+        self.overlay = overlay
+        self.on_quit = on_quit
+        self.running = True
+        columns = max(1, math.ceil(math.sqrt(len(self.cameras))))
+        rows = max(1, math.ceil(len(self.cameras) / columns))
+        self.mosaic = np.full((rows * tile_height, columns * tile_width, 3), self.BACKGROUND, dtype=np.uint8)
+        # {cam_index: [vista de la celda en el mosaico, seq del último frame dibujado, marcada sin frames]}
+        self.tiles = {}
+        for position, cam_index in enumerate(self.cameras):
+            row, column = divmod(position, columns)
+            tile = self.mosaic[row * tile_height:(row + 1) * tile_height,
+                               column * tile_width:(column + 1) * tile_width]
+            self.tiles[cam_index] = [tile, 0, False]
+
+    def stop(self):
+        self.running = False
+
+    def draw_tile(self, cam_index, now):
+        """Copia el frame nuevo de la cámara (si hay) dentro de su celda, conservando la relación de aspecto."""
+        tile, drawn_seq, drawn_stale = self.tiles[cam_index]
+        frame, timestamp, seq = self.camera_manager.get_latest_frame(cam_index)
+        if frame is None:
+            return
+        stale = now - timestamp > self.STALE_AFTER
+        if seq == drawn_seq and stale == drawn_stale:
+            return
+        height, width = frame.shape[:2]
+        scale = min(self.tile_width / width, self.tile_height / height)
+        new_width, new_height = round(width * scale), round(height * scale)
+        x, y = (self.tile_width - new_width) // 2, (self.tile_height - new_height) // 2
+        tile[:] = self.BACKGROUND
+        region = tile[y:y + new_height, x:x + new_width]
+        resized = cv2.resize(frame, (new_width, new_height), dst=region, interpolation=cv2.INTER_AREA)
+        if not np.shares_memory(resized, self.mosaic):
+            region[:] = resized  # cv2 no pudo escribir en la vista (no contigua)
+        if self.overlay is not None:
+            self.overlay(cam_index, region, scale)
+        cv2.putText(tile, f"CAM {cam_index}" + (" (sin frames)" if stale else ""), (8, 22),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255) if stale else (255, 255, 255), 2)
+        self.tiles[cam_index][1:] = [seq, stale]
+
+    def run(self):
+        try:
+            cv2.namedWindow(self.WINDOW_NAME, cv2.WINDOW_NORMAL)
+            while self.running:
+                started = time()
+                for cam_index in self.cameras:
+                    try:
+                        self.draw_tile(cam_index, started)
+                    except Exception as e:
+                        print(f"Error drawing camera {cam_index}: {e}")
+                cv2.imshow(self.WINDOW_NAME, self.mosaic)
+                DISPLAY_REFRESHES.inc()
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    if self.on_quit is not None:
+                        self.on_quit()
+                    break
+                if self.max_fps:
+                    sleep(max(0.0, 1.0 / self.max_fps - (time() - started)))
+        except cv2.error as e:
+            print(f"Display unavailable, continuing headless: {e}")
+        finally:
+            try:
+                cv2.destroyWindow(self.WINDOW_NAME)
+            except cv2.error:
+                pass
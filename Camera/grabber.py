@@ -0,0 +1,119 @@
+import threading
+from time import time, sleep
+import cv2
+from Monitoring.metrics import REGISTRY
+
+FRAMES_GRABBED = REGISTRY.counter("sentinel_frames_grabbed", "Packets read from the camera stream", ["camera"])
+FRAMES_DECODED = REGISTRY.counter("sentinel_frames_decoded", "Frames decoded and published", ["camera"])
+CAPTURE_ERRORS = REGISTRY.counter("sentinel_capture_errors", "Failed grab or retrieve calls", ["camera"])
+
+
+def open_capture(url, open_timeout_ms=5000, read_timeout_ms=5000):
+    """
+    cv2.VideoCapture sobre FFmpeg con tiempos máximos de apertura y de lectura,
+    para que un canal muerto no bloquee durante el timeout por defecto de FFmpeg.
+    """
+    return cv2.VideoCapture(url, cv2.CAP_FFMPEG, [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, int(open_timeout_ms),
+                                                  cv2.CAP_PROP_READ_TIMEOUT_MSEC, int(read_timeout_ms)])
+
+
+class LatestFrame:
+    """
+    Slot protegido por lock con el último frame decodificado de una cámara.
+    Solo guarda un frame: publicar uno nuevo reemplaza al anterior, por lo que
+    los consumidores siempre leen el más reciente y no hay colas que crezcan.
+    Los consumidores no deben modificar el frame en el lugar.
+    """
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.frame = None
+        self.timestamp = 0.0
+        self.seq = 0
+        self.listeners = []  # Llamados con (frame, timestamp) en el hilo de captura
+
+    def publish(self, frame, timestamp):
+        with self.condition:
+            self.frame = frame
+            self.timestamp = timestamp
+            self.seq += 1
+            self.condition.notify_all()
+        for listener in self.listeners:
+            try:
+                listener(frame, timestamp)
+            except Exception as e:
+                print(f"Error in frame listener: {e}")
+
+    def get(self):
+        """Devuelve (frame, timestamp, seq) del último frame publicado."""
+        with self.condition:
+            return self.frame, self.timestamp, self.seq
+
+    def wait_newer(self, seq, timeout=None):
+        """Espera un frame con número de secuencia mayor a seq."""
+        with self.condition:
+            self.condition.wait_for(lambda: self.seq > seq, timeout)
+            if self.seq > seq:
+                return self.frame, self.timestamp, self.seq
+            return None, 0.0, seq
+
+
+class FrameGrabber(threading.Thread):
+    """
+    Vacía continuamente el stream de una cámara. Todos los paquetes se leen
+    con grab() para que el buffer RTSP no acumule frames viejos, pero solo se
+    decodifican con retrieve() los que respetan max_decode_fps.
+    """
+    MAX_CONSECUTIVE_FAILURES = 50
+
+    def __init__(self, cam_index, cap, slot: LatestFrame, max_decode_fps=15):
+        super().__init__(name=f"grabber-cam-{cam_index}", daemon=True)
+        self.cam_index = cam_index
+        self.cap = cap
+        self.slot = slot
+        self.decode_interval = 1.0 / max_decode_fps if max_decode_fps else 0.0
+        self.running = True
+        self.failed = False
+        self.grabbed = FRAMES_GRABBED.labels(cam_index)
+        self.decoded = FRAMES_DECODED.labels(cam_index)
+        self.errors = CAPTURE_ERRORS.labels(cam_index)
+
+    def stop(self):
+        self.running = False
+
+    def run(self):
+        last_retrieve = 0.0
+        failures = 0
+        try:
+            while self.running:
+                if not self.cap.isOpened() or failures >= self.MAX_CONSECUTIVE_FAILURES:
+                    print(f"Grabber de la cámara {self.cam_index} detenido: el stream no responde.")
+                    self.failed = True
+                    break
+
+                if not self.cap.grab():
+                    failures += 1
+                    self.errors.inc()
+                    sleep(0.05)
+                    continue
+                if not self.running:
+                    break  # Replaced by a reconnection while blocked in grab(): don't publish a stale frame
+                self.grabbed.inc()
+
+                now = time()
+                if now - last_retrieve < self.decode_interval:
+                    failures = 0
+                    continue
+
+                ret, frame = self.cap.retrieve()
+                if not ret:
+                    failures += 1
+                    self.errors.inc()
+                    continue
+                failures = 0
+                last_retrieve = now
+                self.decoded.inc()
+                self.slot.publish(frame, now)
+        finally:
+            # El grabber es dueño de la captura: liberarla desde otro hilo mientras
+            # grab() sigue bloqueado puede romper FFmpeg
+            self.cap.release()
@@ -0,0 +1,66 @@
+import threading
+from collections import deque
+import cv2
+import numpy as np
+
+
+class FrameRecorder:
+    """
+    Ring buffer continuo de frames comprimidos en JPEG de una cámara.
+    Guarda como máximo max_seconds de video y nunca más de max_bytes; los
+    frames más viejos se descartan primero. Se alimenta desde la captura a
+    record_fps, por lo que las alertas pueden incluir lo ocurrido antes de
+    la detección (pre-roll).
+    """
+    def __init__(self, max_bytes=16 * 1024 * 1024, max_seconds=15.0, record_fps=10, quality=70):
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.interval = 1.0 / record_fps if record_fps else 0.0
+        self.encode_params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        self.frames = deque()  # [(timestamp, jpeg bytes)]
+        self.total_bytes = 0
+        self.last_added = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, frame, timestamp):
+        """Comprime y agrega un frame si corresponde según record_fps."""
+        if timestamp - self.last_added < self.interval:
+            return
+        self.last_added = timestamp
+        ok, jpeg = cv2.imencode(".jpg", frame, self.encode_params)
+        if not ok:
+            return
+        data = jpeg.tobytes()
+        with self.lock:
+            self.frames.append((timestamp, data))
+            self.total_bytes += len(data)
+            while self.frames and (self.total_bytes > self.max_bytes or
+                                   timestamp - self.frames[0][0] > self.max_seconds):
+                _, old = self.frames.popleft()
+                self.total_bytes -= len(old)
+
+    def slice(self, start, end):
+        """Frames comprimidos con timestamp entre start y end: [(timestamp, jpeg bytes)]."""
+        with self.lock:
+            return [(ts, data) for ts, data in self.frames if start <= ts <= end]
+
+    def clip(self, start, end):
+        """
+        Frames entre start y end: (cantidad, generador de (timestamp, ndarray)).
+        Los JPEG se toman ahora y se decodifican de a uno al iterar, así el
+        clip nunca está entero en memoria sin comprimir.
+        """
+        compressed = self.slice(start, end)
+        return len(compressed), self._decode(compressed)
+
+    @staticmethod
+    def _decode(compressed):
+        for timestamp, data in compressed:
+            frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if frame is not None:
+                yield timestamp, frame
+
+    def stats(self):
+        with self.lock:
+            span = self.frames[-1][0] - self.frames[0][0] if self.frames else 0.0
+            return {"frames": len(self.frames), "bytes": self.total_bytes, "seconds": span}
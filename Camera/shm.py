@@ -0,0 +1,229 @@
+import threading
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import cv2
+import numpy as np
+from time import time, sleep
+from grabber import LatestFrame, FRAMES_DECODED, open_capture
+
+
+class SharedFrameRing:
+    """
+    Ring buffer de frames en memoria compartida con slots de tamaño fijo.
+
+    El proceso de captura decodifica directamente dentro de un slot y luego
+    publica su número de secuencia; el lector copia el slot más reciente y
+    verifica que no haya sido sobrescrito mientras lo copiaba (seqlock).
+    No hay pickling: solo el nombre del bloque viaja entre procesos.
+    """
+    HEADER_FIELDS = 2  # seq, timestamp por slot
+
+    def __init__(self, shape, slots=4, name=None):
+        self.shape = tuple(shape)
+        self.slots = slots
+        header_bytes = (slots * self.HEADER_FIELDS + 1) * 8
+        frame_bytes = int(np.prod(self.shape))
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=header_bytes + slots * frame_bytes)
+        else:
+            self.shm = _attach_shared_memory(name)
+        self.name = self.shm.name
+        self.header = np.ndarray((slots, self.HEADER_FIELDS), dtype=np.float64, buffer=self.shm.buf)
+        self.latest = np.ndarray((1,), dtype=np.float64, buffer=self.shm.buf,
+                                 offset=slots * self.HEADER_FIELDS * 8)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.shm.buf,
+                                 offset=header_bytes)
+        if self.owner:
+            self.header[:] = -1
+            self.latest[0] = 0
+
+    def next_slot(self):
+        """Slot donde escribir el próximo frame y su número de secuencia."""
+        seq = int(self.latest[0]) + 1
+        index = seq % self.slots
+        self.header[index, 0] = -1  # Marcar el slot como en escritura
+        return seq, self.frames[index]
+
+    def commit(self, seq, timestamp):
+        index = seq % self.slots
+        self.header[index, 1] = timestamp
+        self.header[index, 0] = seq
+        self.latest[0] = seq
+
+    def latest_seq(self):
+        return int(self.latest[0])
+
+    def read(self, seq):
+        """Copia el frame seq; devuelve (frame, timestamp) o (None, 0.0) si fue sobrescrito."""
+        index = seq % self.slots
+        if self.header[index, 0] != seq:
+            return None, 0.0
+        timestamp = float(self.header[index, 1])
+        frame = self.frames[index].copy()
+        if self.header[index, 0] != seq:
+            return None, 0.0
+        return frame, timestamp
+
+    def close(self):
+        # Soltar las vistas antes de cerrar el bloque
+        self.header = self.latest = self.frames = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _attach_shared_memory(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: los procesos hijos comparten el resource tracker del padre,
+        # que es quien hace unlink del bloque
+        return shared_memory.SharedMemory(name=name)
+
+
+def _open_capture(url, open_timeout_ms, read_timeout_ms):
+    cap = open_capture(url, open_timeout_ms, read_timeout_ms)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+
+def capture_worker(cam_index, url, ring_name, shape, slots, conn, max_decode_fps, open_timeout_ms, read_timeout_ms):
+    """Proceso de captura: drena el stream y decodifica frames directo en el ring compartido."""
+    ring = SharedFrameRing(shape, slots, name=ring_name)
+    height, width = shape[:2]
+    decode_interval = 1.0 / max_decode_fps if max_decode_fps else 0.0
+    cap = _open_capture(url, open_timeout_ms, read_timeout_ms)
+    last_retrieve = 0.0
+    failures = 0
+    try:
+        while True:
+            if conn.poll() and conn.recv() == "stop":
+                break
+
+            if not cap.isOpened() or failures >= 50:
+                conn.send(("failed", f"Cámara {cam_index}: el stream no responde"))
+                break
+
+            if not cap.grab():
+                failures += 1
+                sleep(0.05)
+                continue
+
+            now = time()
+            if now - last_retrieve < decode_interval:
+                failures = 0
+                continue
+
+            seq, slot = ring.next_slot()
+            ret, frame = cap.retrieve(slot)
+            if not ret:
+                failures += 1
+                continue
+            if frame is not slot and frame.shape != slot.shape:
+                # La resolución del stream cambió: ajustarla al tamaño del slot
+                cv2.resize(frame, (width, height), dst=slot)
+            elif frame is not slot:
+                np.copyto(slot, frame)
+            failures = 0
+            last_retrieve = now
+            ring.commit(seq, now)
+    finally:
+        cap.release()
+        ring.close()
+        conn.close()
+
+
+class ProcessGrabber:
+    """
+    Equivalente a FrameGrabber que decodifica la cámara en un proceso aparte.
+    Un hilo lector copia el frame más reciente del ring compartido al
+    LatestFrame de la cámara; el pedido de stop y los fallos viajan por un Pipe.
+
+    El proceso se crea con spawn y no con fork: el padre ya corre muchos hilos
+    (carga del modelo, grabbers, bot, scheduler) y un fork puede heredar un lock
+    tomado por alguno de ellos y bloquear al hijo.
+    """
+    POLL_INTERVAL = 0.005
+
+    def __init__(self, cam_index, url, shape, slot: LatestFrame, max_decode_fps=15, ring_slots=4,
+                 open_timeout_ms=5000, read_timeout_ms=5000):
+        self.cam_index = cam_index
+        self.slot = slot
+        self.ring = SharedFrameRing(shape, ring_slots)
+        context = mp.get_context("spawn")
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=capture_worker,
+            args=(cam_index, url, self.ring.name, shape, ring_slots, child_conn, max_decode_fps,
+                  open_timeout_ms, read_timeout_ms),
+            name=f"capture-cam-{cam_index}",
+            daemon=True,
+        )
+        self.reader = threading.Thread(target=self._read_loop, name=f"shm-reader-cam-{cam_index}", daemon=True)
+        self.running = False
+        self.failed = False
+        self.decoded = FRAMES_DECODED.labels(cam_index)
+
+    def start(self):
+        self.running = True
+        self.process.start()
+        self.reader.start()
+
+    def stop(self):
+        self.running = False
+        if self.process.is_alive():
+            try:
+                self.conn.send("stop")
+            except (BrokenPipeError, OSError):
+                pass
+
+    def join(self, timeout=None):
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+        if self.reader.is_alive() and self.reader is not threading.current_thread():
+            self.reader.join(timeout)
+        if self.ring.shm is not None and not self.reader.is_alive():
+            self.ring.close()
+            self.ring.shm = None
+
+    def is_alive(self):
+        return self.running and self.process.is_alive()
+
+    # Interfaz compatible con cv2.VideoCapture para CameraManager.cams
+    def isOpened(self):
+        return self.is_alive() and not self.failed
+
+    def release(self):
+        self.stop()
+        self.join(timeout=1.0)
+
+    def _read_loop(self):
+        last_seq = 0
+        while self.running:
+            if self.conn.poll():
+                try:
+                    status, detail = self.conn.recv()
+                except EOFError:
+                    status, detail = "failed", "proceso de captura terminado"
+                if status == "failed":
+                    print(detail)
+                    self.failed = True
+                    break
+            if not self.process.is_alive() and self.process.exitcode is not None:
+                self.failed = True
+                break
+            seq = self.ring.latest_seq()
+            if seq == last_seq:
+                sleep(self.POLL_INTERVAL)
+                continue
+            frame, timestamp = self.ring.read(seq)
+            if frame is None:
+                continue
+            last_seq = seq
+            self.decoded.inc()
+            self.slot.publish(frame, timestamp)
@@ -0,0 +1,173 @@
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import time
+
+from Monitoring.metrics import REGISTRY
+
+CONNECTING = "connecting"
+STREAMING = "streaming"
+STALLED = "stalled"
+BACKOFF = "backoff"
+FAILED = "failed"
+STATES = (CONNECTING, STREAMING, STALLED, BACKOFF, FAILED)
+
+CAMERA_STATE = REGISTRY.gauge("sentinel_camera_state", "1 for the camera's current supervisor state", ["camera", "state"])
+CAMERA_TRANSITIONS = REGISTRY.counter("sentinel_camera_state_transitions", "Supervisor state changes", ["camera", "state"])
+RECONNECT_ATTEMPTS = REGISTRY.counter("sentinel_camera_reconnect_attempts", "Background reconnection attempts",
+                                      ["camera", "result"])
+
+
+class CameraHealth:
+    """Estado de una cámara según el supervisor."""
+    def __init__(self, cam_index, state, now):
+        self.cam_index = cam_index
+        self.state = state
+        self.since = now
+        self.failures = 0  # Intentos fallidos consecutivos
+        self.next_attempt = now
+        self.last_error = ""
+        self.reconnects = 0
+
+
+class CameraSupervisor(threading.Thread):
+    """
+    Máquina de estados por cámara, revisada cada CHECK_INTERVAL segundos:
+
+        connecting -> streaming            al abrir el stream
+        streaming  -> stalled              sin frames nuevos durante stall_after segundos
+        streaming  -> backoff              si el grabber se detuvo
+        stalled    -> connecting           de inmediato
+        backoff    -> connecting           al vencer la espera
+        connecting -> backoff / failed     si no abre; failed tras fail_after fallos seguidos
+
+    La espera crece exponencialmente (base_delay * 2^fallos, hasta max_delay)
+    con jitter, y una cámara en failed se sigue reintentando cada max_delay,
+    por si vuelve (p. ej. tras un corte de luz). Las reconexiones corren en un
+    pool propio: una cámara lenta no demora a las demás ni a los hilos de
+    procesamiento, que solo esperan frames del slot.
+
+    connect(cam_index) -> bool abre la cámara; on_connected(cam_index) se
+    llama tras cada conexión exitosa.
+    """
+    CHECK_INTERVAL = 0.5
+
+    def __init__(self, camera_manager, connect, on_connected=None, stall_after=10.0, base_delay=1.0,
+                 max_delay=60.0, jitter=0.3, fail_after=8, max_workers=4):
+        super().__init__(name="camera-supervisor", daemon=True)
+        self.camera_manager = camera_manager
+        self.connect = connect
+        self.on_connected = on_connected
+        self.stall_after = stall_after
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.fail_after = fail_after
+        self.cameras = {}  # {cam_index: CameraHealth}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="camera-reconnect")
+
+    def watch(self, cam_index, streaming):
+        """Empieza a supervisar una cámara, ya abierta (streaming) o a reintentar."""
+        now = time()
+        with self.lock:
+            health = CameraHealth(cam_index, STREAMING if streaming else BACKOFF, now)
+            if not streaming:
+                health.failures = 1
+                health.next_attempt = now + self.backoff_delay(1)
+            self.cameras[cam_index] = health
+        for state in STATES:
+            CAMERA_STATE.labels(cam_index, state).set(int(state == health.state))
+
+    def stop(self):
+        self.stopped.set()
+        self.pool.shutdown(wait=False)
+
+    def backoff_delay(self, failures):
+        delay = min(self.max_delay, self.base_delay * 2 ** max(failures - 1, 0))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def health(self):
+        """{cam_index: dict} con estado, segundos en ese estado, edad del último frame y reintentos."""
+        now = time()
+        with self.lock:
+            cameras = list(self.cameras.values())
+        result = {}
+        for health in sorted(cameras, key=lambda h: h.cam_index):
+            _, timestamp, _ = self.camera_manager.get_latest_frame(health.cam_index)
+            result[health.cam_index] = {
+                "state": health.state,
+                "for_seconds": now - health.since,
+                "frame_age": now - timestamp if timestamp else None,
+                "failures": health.failures,
+                "reconnects": health.reconnects,
+                "retry_in": max(0.0, health.next_attempt - now) if health.state in (BACKOFF, FAILED) else None,
+                "last_error": health.last_error,
+            }
+        return result
+
+    def _set_state(self, health, state, now):
+        # Llamar con self.lock tomado
+        if health.state == state:
+            return
+        CAMERA_STATE.labels(health.cam_index, health.state).set(0)
+        CAMERA_STATE.labels(health.cam_index, state).set(1)
+        CAMERA_TRANSITIONS.labels(health.cam_index, state).inc()
+        print(f"Cámara {health.cam_index}: {health.state} -> {state}")
+        health.state = state
+        health.since = now
+
+    def run(self):
+        while not self.stopped.wait(self.CHECK_INTERVAL):
+            now = time()
+            with self.lock:
+                cameras = list(self.cameras.values())
+            for health in cameras:
+                try:
+                    self._check(health, now)
+                except Exception as e:
+                    print(f"Error supervising camera {health.cam_index}: {e}")
+
+    def _check(self, health, now):
+        cam_index = health.cam_index
+        with self.lock:
+            if health.state == STREAMING:
+                if not self.camera_manager.is_streaming(cam_index):
+                    health.last_error = "el stream se cerró"
+                    health.next_attempt = now + self.backoff_delay(1)
+                    self._set_state(health, BACKOFF, now)
+                    return
+                _, timestamp, _ = self.camera_manager.get_latest_frame(cam_index)
+                if timestamp and now - timestamp > self.stall_after:
+                    health.last_error = f"sin frames hace {now - timestamp:.0f} s"
+                    health.next_attempt = now
+                    self._set_state(health, STALLED, now)
+                return
+            if health.state == CONNECTING or now < health.next_attempt:
+                return
+            self._set_state(health, CONNECTING, now)
+        self.pool.submit(self._reconnect, health)
+
+    def _reconnect(self, health):
+        cam_index = health.cam_index
+        try:
+            # Detener el grabber trabado antes de abrir el stream de nuevo
+            self.camera_manager.stop_grabber(cam_index)
+            connected, error = self.connect(cam_index), ""
+        except Exception as e:
+            connected, error = False, str(e)
+        now = time()
+        RECONNECT_ATTEMPTS.labels(cam_index, "ok" if connected else "failed").inc()
+        with self.lock:
+            if connected:
+                health.failures = 0
+                health.reconnects += 1
+                self._set_state(health, STREAMING, now)
+            else:
+                health.failures += 1
+                health.last_error = error or "no se pudo abrir el stream"
+                health.next_attempt = now + self.backoff_delay(health.failures)
+                self._set_state(health, FAILED if health.failures >= self.fail_after else BACKOFF, now)
+        if connected and self.on_connected is not None:
+            self.on_connected(cam_index)
@@ -1,43 +1,155 @@
+import atexit
+import copy
 import json
-from time import sleep
+import os
+import tempfile
+import threading
+from types import MappingProxyType
+from time import sleep, monotonic
+
+# Ruta del archivo de memoria: junto a este módulo, o la indicada en SENTINEL_MEMORY
+MEMORY_PATH = os.environ.get("SENTINEL_MEMORY") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "memory.json")
+
+def freeze(value):
+    """Copia inmutable de un valor JSON: dicts de solo lectura y listas como tuplas."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+class ConfigSnapshot:
+    """
+    Foto inmutable y versionada de la configuración. MemoryData publica una
+    nueva en cada cambio; leer memory.config es una sola carga de referencia,
+    sin locks, y la foto obtenida no cambia mientras se la usa.
+    """
+    __slots__ = ("version", "data")
+
+    def __init__(self, version, data):
+        self.version = version
+        self.data = freeze(data)
+
+    def get(self, keys, default=None):
+        """Valor anidado con notación de puntos, o default si no existe o es None."""
+        current = self.data
+        for key in keys.split("."):
+            if not isinstance(current, MappingProxyType):
+                return default
+            current = current.get(key)
+            if current is None:
+                return default
+        return current
 
 class MemoryData:
-    def __init__(self):
+    """
+    Estado de configuración en memoria, que es la fuente de verdad. Los cambios
+    se aplican al instante y se persisten en segundo plano (write-behind): un
+    hilo agrupa los cambios de FLUSH_DELAY segundos y reescribe el archivo de
+    forma atómica (archivo temporal, fsync y os.replace), así el archivo nunca
+    queda a medio escribir y quien cambia un valor no espera al disco.
+
+    Cada cambio publica además un ConfigSnapshot en self.config y notifica a
+    los suscriptores, para que los hilos de trabajo no consulten el dict.
+    """
+    LOAD_RETRIES = 5
+    FLUSH_DELAY = 0.5  # Segundos sin cambios antes de escribir
+    MAX_FLUSH_DELAY = 5.0  # Con cambios continuos, escribir al menos cada tantos segundos
+
+    def __init__(self, path=None):
+        self.path = path or MEMORY_PATH
         self.data = {}
+        self.lock = threading.RLock()
+        self.write_lock = threading.Lock()  # Serializa las escrituras al archivo
+        self.changed = threading.Condition(self.lock)
+        self.dirty = False
+        self.last_change = 0.0
+        self.running = True
+        self.config = ConfigSnapshot(0, {})
+        self.subscribers = []  # Callbacks que reciben el nuevo ConfigSnapshot
+        self.notify_lock = threading.Lock()
+        self.notified_version = 0
         self.load_memory_data()
-        
+        self.writer = threading.Thread(target=self._write_behind, name="memory-writer", daemon=True)
+        self.writer.start()
+        atexit.register(self.close)
+
     def get(self, key):
-        """Obtiene el valor asociado a una clave."""
-        return self.data.get(key)
-    
+        """Obtiene (una copia de) el valor asociado a una clave."""
+        with self.lock:
+            return copy.deepcopy(self.data.get(key))
+
     def set(self, key, value):
         """Establece un valor asociado a una clave."""
-        self.data[key] = value
-        self.save_memory_data()
-    
+        with self.lock:
+            self.data[key] = copy.deepcopy(value)
+            self._mark_dirty()
+            self._publish()
+        self._notify()
+
     def save_memory_data(self):
-        """Guarda los datos en un archivo JSON."""
-        with open("memory.json", "w") as f:
-            json.dump(self.data, f)
+        """Programa la escritura de los datos en el archivo JSON."""
+        with self.lock:
+            self._mark_dirty()
+
+    def flush(self):
+        """Escribe ya los cambios pendientes. Se llama al cerrar."""
+        with self.write_lock:
+            with self.lock:
+                if not self.dirty:
+                    return
+                payload = json.dumps(self.data, indent=4, ensure_ascii=False)
+                self.dirty = False
+            try:
+                self._atomic_write(payload)
+            except OSError as e:
+                print(f"Error guardando la memoria en {self.path}: {e}")
+                with self.lock:
+                    self._mark_dirty()
+
+    def close(self):
+        """Detiene el hilo de escritura y persiste lo pendiente."""
+        with self.lock:
+            self.running = False
+            self.changed.notify_all()
+        self.flush()
 
     def load_memory_data(self):
-        """Carga los datos desde un archivo JSON."""
-        try:
-            with open("memory.json", "r") as f:
-                data = json.load(f)
-                self.data = data
-        except (FileNotFoundError, json.JSONDecodeError):
-            print("No se pudo cargar la memoria. Reintentando...")
-            sleep(1)
-            self.load_memory_data()
-            
+        """Carga los datos desde el archivo JSON; tras LOAD_RETRIES intentos propaga el error."""
+        for attempt in range(1, self.LOAD_RETRIES + 1):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                with self.lock:
+                    self.data = data
+                    self._publish()
+                    self.notified_version = self.config.version
+                return
+            except (FileNotFoundError, json.JSONDecodeError) as e:
+                if attempt == self.LOAD_RETRIES:
+                    print(f"No se pudo cargar la memoria desde {self.path}: {e}")
+                    raise
+                print(f"No se pudo cargar la memoria. Reintentando ({attempt}/{self.LOAD_RETRIES})...")
+                sleep(1)
+
     def get_nested(self, keys):
         """Obtiene un valor anidado utilizando una notación de puntos."""
-        return self._get_nested_value(keys, self.data)
+        with self.lock:
+            return copy.deepcopy(self._get_nested_value(keys, self.data))
 
     def set_nested(self, keys, value):
         """Establece un valor en un diccionario anidado mediante una notación de puntos."""
-        self._set_nested_value(keys, value, self.data)
+        with self.lock:
+            self._set_nested_value(keys, copy.deepcopy(value), self.data)
+            self._publish()
+        self._notify()
+
+    def subscribe(self, callback):
+        """Registra callback(snapshot), llamado en el hilo que hizo el cambio tras cada cambio."""
+        with self.lock:
+            self.subscribers.append(callback)
+        return callback
 
     def _get_nested_value(self, keys, current_data):
         """Obtiene un valor anidado utilizando una notación de puntos."""
@@ -50,9 +162,70 @@ class MemoryData:
 
     def _set_nested_value(self, keys, value, current_data):
         """Establece un valor en un diccionario anidado mediante una notación de puntos."""
-        print(value)
         keys = keys.split(".")
         for key in keys[:-1]:
             current_data = current_data.setdefault(key, {})  # Cambiado a current_data
         current_data[keys[-1]] = value
-        self.save_memory_data()
+        self._mark_dirty()
+
+    def _publish(self):
+        # Llamar con self.lock tomado
+        self.config = ConfigSnapshot(self.config.version + 1, self.data)
+        return self.config
+
+    def _notify(self):
+        # Entregar siempre la foto más nueva, en orden de versión, aunque haya cambios concurrentes
+        with self.notify_lock:
+            snapshot = self.config
+            if snapshot.version <= self.notified_version:
+                return
+            self.notified_version = snapshot.version
+            for callback in list(self.subscribers):
+                try:
+                    callback(snapshot)
+                except Exception as e:
+                    print(f"Error applying configuration change: {e}")
+
+    def _mark_dirty(self):
+        # Llamar con self.lock tomado
+        self.dirty = True
+        self.last_change = monotonic()
+        self.changed.notify_all()
+
+    def _atomic_write(self, payload):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(prefix=".memory-", suffix=".json", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        if hasattr(os, "O_DIRECTORY"):
+            # Persistir también la entrada del directorio (POSIX)
+            dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+    def _write_behind(self):
+        while True:
+            with self.lock:
+                while self.running and not self.dirty:
+                    self.changed.wait()
+                if not self.running:
+                    return
+                # Debounce: esperar a que los cambios se calmen, sin demorar más de MAX_FLUSH_DELAY
+                first_change = monotonic()
+                while self.running:
+                    now = monotonic()
+                    wait = min(self.last_change + self.FLUSH_DELAY, first_change + self.MAX_FLUSH_DELAY) - now
+                    if wait <= 0:
+                        break
+                    self.changed.wait(wait)
+            self.flush()
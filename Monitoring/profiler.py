@@ -0,0 +1,175 @@
+import os
+import signal
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from time import sleep, time
+
+import psutil
+
+
+def process_stats(process=None):
+    """RSS, memoria virtual, hilos y tiempos de CPU del proceso."""
+    process = process or psutil.Process()
+    with process.oneshot():
+        memory = process.memory_info()
+        cpu = process.cpu_times()
+        return {
+            "rss_mb": memory.rss / 1024 / 1024,
+            "vms_mb": memory.vms / 1024 / 1024,
+            "threads": process.num_threads(),
+            "cpu_user_s": cpu.user,
+            "cpu_system_s": cpu.system,
+        }
+
+
+class Profiler:
+    """
+    Diagnóstico bajo demanda, apagado por defecto: sin ventana abierta no
+    agrega ningún costo. start(seconds) abre una ventana acotada en la que un
+    hilo muestrea cada interval segundos las pilas de los demás hilos
+    (sys._current_frames) y tracemalloc registra las asignaciones; al cerrar
+    la ventana escribe un reporte de texto con las funciones con más muestras
+    por hilo, las líneas que más memoria sumaron y el estado del proceso, más
+    las pilas en formato "folded" para armar un flame graph.
+    """
+    def __init__(self, seconds=30, output_dir=".", interval=0.01, top=20, tracemalloc_frames=1):
+        self.seconds = seconds  # Ventana por defecto
+        self.output_dir = output_dir
+        self.interval = interval
+        self.top = top
+        self.tracemalloc_frames = tracemalloc_frames
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.last_report = None
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, seconds=None, on_done=None):
+        """
+        Abre una ventana de seconds segundos (self.seconds si no se indica) en
+        segundo plano. on_done(path, error) se llama al terminar. Devuelve False
+        si ya hay una ventana abierta.
+        """
+        seconds = seconds or self.seconds
+        with self.lock:
+            if self.running:
+                return False
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run, args=(seconds, on_done), name="profiler", daemon=True)
+            self.thread.start()
+            return True
+
+    def stop(self):
+        """Cierra antes de tiempo la ventana abierta; el reporte se escribe igual."""
+        self.stop_event.set()
+
+    def _run(self, seconds, on_done):
+        path, error = None, None
+        try:
+            path = self._profile(seconds)
+            self.last_report = path
+            print(f"Perfil guardado en {path}")
+        except Exception as e:
+            error = e
+            print(f"Error perfilando: {e}")
+        if on_done is not None:
+            try:
+                on_done(path, error)
+            except Exception as e:
+                print(f"Error entregando el perfil: {e}")
+
+    def _profile(self, seconds):
+        process = psutil.Process()
+        stats_before = process_stats(process)
+        # Si alguien ya activó tracemalloc (p. ej. python -X tracemalloc) no lo apagamos al terminar
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(self.tracemalloc_frames)
+        try:
+            snapshot_before = tracemalloc.take_snapshot()
+            stacks, leaf_counts, samples, elapsed = self._sample(seconds)
+            snapshot_after = tracemalloc.take_snapshot()
+            traced_current, traced_peak = tracemalloc.get_traced_memory()
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+        stats_after = process_stats(process)
+        # Sin las asignaciones del propio perfilador
+        ignore = [tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__)]
+        allocation_diff = snapshot_after.filter_traces(ignore).compare_to(snapshot_before.filter_traces(ignore), "lineno")
+
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"profile_{stamp}.txt")
+        with open(os.path.join(self.output_dir, f"profile_{stamp}.folded"), "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        cpu = (stats_after["cpu_user_s"] + stats_after["cpu_system_s"]
+               - stats_before["cpu_user_s"] - stats_before["cpu_system_s"])
+        lines = [
+            f"Perfil de {elapsed:.1f} s, {samples} muestras cada {self.interval * 1000:.0f} ms",
+            "",
+            "== Proceso ==",
+            f"RSS: {stats_before['rss_mb']:.1f} -> {stats_after['rss_mb']:.1f} MB",
+            f"Memoria virtual: {stats_after['vms_mb']:.1f} MB",
+            f"Hilos: {stats_after['threads']}",
+            f"CPU: {cpu:.2f} s ({cpu / elapsed * 100 if elapsed else 0:.0f}% de un núcleo)",
+            f"tracemalloc: {traced_current / 1e6:.2f} MB vivos, pico {traced_peak / 1e6:.2f} MB",
+            "",
+            "== Funciones con más muestras por hilo (self) ==",
+        ]
+        for thread_name in sorted(leaf_counts, key=lambda name: -sum(leaf_counts[name].values())):
+            counts = leaf_counts[thread_name]
+            total = sum(counts.values())
+            lines.append(f"-- {thread_name} ({total} muestras)")
+            for function, count in counts.most_common(self.top):
+                lines.append(f"  {count * 100 / total:5.1f}%  {function}")
+        lines += ["", f"== Top {self.top} asignaciones (diferencia en la ventana) =="]
+        for stat in allocation_diff[:self.top]:
+            lines.append(f"  {stat.size_diff / 1024:+10.1f} KiB {stat.count_diff:+8d} bloques  {stat.traceback[0]}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        return path
+
+    def _sample(self, seconds):
+        """Muestrea las pilas de todos los hilos salvo este; devuelve pilas folded y hojas por hilo."""
+        own_id = threading.get_ident()
+        stacks = Counter()  # {"hilo;func;func;...": muestras}
+        leaf_counts = {}  # {hilo: Counter({función: muestras})}
+        samples = 0
+        start = time()
+        deadline = start + seconds
+        while time() < deadline and not self.stop_event.is_set():
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                functions = []
+                while frame is not None:
+                    code = frame.f_code
+                    functions.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                thread_name = names.get(thread_id, str(thread_id))
+                stacks[";".join([thread_name] + functions[::-1])] += 1
+                leaf_counts.setdefault(thread_name, Counter())[functions[0]] += 1
+            samples += 1
+            sleep(self.interval)
+        return stacks, leaf_counts, samples, time() - start
+
+
+def install_signal_handler(profiler, signum=getattr(signal, "SIGUSR1", None)):
+    """Abre una ventana de perfilado al recibir signum (SIGUSR1). Llamar desde el hilo principal."""
+    if signum is None:
+        return False  # Windows no tiene SIGUSR1
+    signal.signal(signum, lambda *_: profiler.start())
+    return True
+
+
+PROFILER = Profiler()
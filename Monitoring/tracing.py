@@ -0,0 +1,142 @@
+import heapq
+import itertools
+import json
+import threading
+from datetime import datetime
+from time import time
+from Monitoring.metrics import REGISTRY
+
+# Etapas en el orden en que las atraviesa un frame y, si dispara, su alerta
+FRAME_STAGES = ("capture", "dequeued", "preprocessed", "infer_enqueued", "infer_start", "infer_end", "postprocessed")
+ALERT_STAGES = ("alert_queued", "dispatched", "encode_start", "encode_end", "send_start", "delivered")
+STAGES = FRAME_STAGES + ALERT_STAGES
+
+STAGE_SECONDS = REGISTRY.histogram("sentinel_stage_seconds", "Time spent reaching each pipeline stage from the previous one",
+                                   ["camera", "stage"])
+
+
+class Trace:
+    """
+    Marcas de tiempo (epoch) de un frame a lo largo del pipeline. Si el frame
+    dispara una alerta, la misma traza sigue con las etapas de la alerta.
+    """
+    __slots__ = ("camera_id", "marks")
+
+    def __init__(self, camera_id, capture_time=None):
+        self.camera_id = camera_id
+        self.marks = {}
+        if capture_time:
+            self.marks["capture"] = capture_time
+
+    def mark(self, stage, timestamp=None):
+        self.marks[stage] = timestamp if timestamp is not None else time()
+
+    def copy(self):
+        trace = Trace(self.camera_id)
+        trace.marks = dict(self.marks)
+        return trace
+
+    def durations(self, stages=STAGES):
+        """[(etapa, segundos desde la etapa anterior presente)]"""
+        result = []
+        previous = None
+        for stage in stages:
+            timestamp = self.marks.get(stage)
+            if timestamp is None:
+                continue
+            if previous is not None:
+                result.append((stage, max(0.0, timestamp - previous)))
+            previous = timestamp
+        return result
+
+    def total(self):
+        present = [self.marks[stage] for stage in STAGES if stage in self.marks]
+        return present[-1] - present[0] if len(present) > 1 else 0.0
+
+    def as_dict(self):
+        start = min(self.marks.values()) if self.marks else 0.0
+        return {
+            "camera": self.camera_id,
+            "start": datetime.fromtimestamp(start).isoformat(timespec="milliseconds") if start else None,
+            "total_ms": round(self.total() * 1000, 1),
+            "stages_ms": {stage: round(seconds * 1000, 1) for stage, seconds in self.durations()},
+        }
+
+
+class LatencyTracer:
+    """
+    Agrega por cámara la duración de cada etapa (en el histograma
+    sentinel_stage_seconds y en promedios para el bot) y guarda en un
+    flight recorder las slowest alertas más lentas de punta a punta.
+    """
+    def __init__(self, slowest=20):
+        self.slowest = slowest
+        self.enabled = True
+        self.lock = threading.Lock()
+        self.totals = {}  # {(camera, etapa): [cantidad, suma de segundos]}
+        self.children = {}  # {(camera, etapa): serie del histograma}
+        self.alerts = []  # Min-heap (total, orden, traza) con las alertas más lentas
+        self.counter = itertools.count()
+
+    def _observe(self, trace, stages):
+        for stage, seconds in trace.durations(stages):
+            key = (trace.camera_id, stage)
+            child = self.children.get(key)
+            if child is None:
+                child = self.children[key] = STAGE_SECONDS.labels(trace.camera_id, stage)
+            child.observe(seconds)
+            with self.lock:
+                total = self.totals.setdefault(key, [0, 0.0])
+                total[0] += 1
+                total[1] += seconds
+
+    def record_frame(self, trace: Trace):
+        """Registra las etapas de un frame inferido."""
+        if self.enabled and trace is not None:
+            self._observe(trace, FRAME_STAGES)
+
+    def record_alert(self, trace: Trace):
+        """Registra las etapas de una alerta entregada y la guarda si está entre las más lentas."""
+        if not self.enabled or trace is None:
+            return
+        # La primera etapa de la alerta se mide desde el final del frame que la disparó
+        self._observe(trace, ("postprocessed",) + ALERT_STAGES)
+        entry = (trace.total(), next(self.counter), trace)
+        with self.lock:
+            if len(self.alerts) < self.slowest:
+                heapq.heappush(self.alerts, entry)
+            elif entry[0] > self.alerts[0][0]:
+                heapq.heapreplace(self.alerts, entry)
+
+    def breakdown(self):
+        """{camera: [(etapa, promedio en segundos, cantidad)]} en el orden del pipeline."""
+        with self.lock:
+            totals = dict(self.totals)
+        result = {}
+        for stage in STAGES:
+            for (camera_id, total_stage), (count, seconds) in totals.items():
+                if total_stage == stage and count:
+                    result.setdefault(camera_id, []).append((stage, seconds / count, count))
+        return result
+
+    def slowest_alerts(self):
+        with self.lock:
+            entries = sorted(self.alerts, reverse=True)
+        return [trace.as_dict() for _, _, trace in entries]
+
+    def dump(self, path):
+        """Escribe en path (JSON) las alertas más lentas y el desglose por cámara."""
+        payload = {
+            "generated": datetime.now().isoformat(timespec="seconds"),
+            "slowest_alerts": self.slowest_alerts(),
+            "breakdown_ms": {
+                str(camera_id): {stage: round(seconds * 1000, 1) for stage, seconds, _ in stages}
+                for camera_id, stages in self.breakdown().items()
+            },
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2, ensure_ascii=False)
+        return path
+
+
+TRACER = LatencyTracer()
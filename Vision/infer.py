@@ -1,12 +1,50 @@
+import threading
+import numpy as np
 import Memory.memory as M
+from model import model_input
+from time import perf_counter
+from Monitoring.metrics import REGISTRY
+
+INFERENCE_SECONDS = REGISTRY.histogram("sentinel_inference_seconds", "Duration of one model predict call")
+INFERENCE_BATCH = REGISTRY.histogram("sentinel_inference_batch_size", "Frames per predict call",
+                                     buckets=(1, 2, 3, 4, 6, 8, 12, 16))
+INFERENCE_FRAMES = REGISTRY.counter("sentinel_inference_frames", "Frames run through the model")
 
 class ModelInference:
     def __init__(self, model, memory_data: M.MemoryData):
+        self.model = None
+        self.ready = threading.Event()  # Se activa cuando hay un modelo cargado
+        if model is not None:
+            self.set_model(model)
+        self.apply_config(memory_data.config)
+        memory_data.subscribe(self.apply_config)
+
+    def set_model(self, model):
+        """Instala el modelo (p. ej. al terminar la carga en segundo plano)."""
         self.model = model
-        self.infer_activated = memory_data.get_nested("inference.activated.status")
-        self.infer_threshold = memory_data.get_nested("inference.threshold")
+        self.ready.set()
 
-    def infer(self, frame):
-        if self.infer_activated:
-            results = self.model.predict(frame, classes=[0], verbose=False)
+    def apply_config(self, config: M.ConfigSnapshot):
+        """Toma el estado de activación y el threshold de cada nueva configuración."""
+        self.infer_threshold = config.get("inference.threshold")
+        self.infer_activated = bool(config.get("inference.activated.status"))
+
+    def infer_batch(self, frames):
+        """
+        Ejecuta un único predict sobre una lista de frames; un resultado por frame.
+        Los tensores CHW de Letterbox (todos del mismo tamaño) se apilan en un
+        batch que el modelo usa sin volver a redimensionar; las cajas quedan en
+        coordenadas del tensor. torch solo se importa si el modelo lo necesita.
+        """
+        if self.infer_activated and frames:
+            if isinstance(frames[0], np.ndarray) and frames[0].dtype == np.float32:
+                frames = model_input(self.model, np.stack(frames))
+            start = perf_counter()
+            results = self.model.predict(frames, classes=[0], verbose=False)
+            self.record(start, len(frames))
             return results
+
+    def record(self, start, batch_size):
+        INFERENCE_SECONDS.observe(perf_counter() - start)
+        INFERENCE_BATCH.observe(batch_size)
+        INFERENCE_FRAMES.inc(batch_size)
@@ -1,8 +1,62 @@
-from ultralytics import YOLO
-import torch
+import hashlib
+import os
+import shutil
+import threading
+from concurrent.futures import Future
+import numpy as np
+from runtime import ExportedModel
+
+MODEL_PATH = "yolo11n.pt"
+# Exported artifacts are cached next to this module, keyed by weights hash and input size
+EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "exported")
+# Backend name -> suffix ultralytics gives the exported artifact
+EXPORT_SUFFIXES = {
+    "onnx": ".onnx",
+    "openvino": "_openvino_model",
+}
+
+
+def weights_hash(model_path):
+    """SHA-256 of the weights file, so re-trained weights never reuse a stale export"""
+    sha = hashlib.sha256()
+    with open(model_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def exported_model_path(model_path, backend, imgsz):
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    key = weights_hash(model_path)[:16]
+    return os.path.join(EXPORT_DIR, f"{stem}-{key}-{imgsz}{EXPORT_SUFFIXES[backend]}")
+
+
+def export_model(model_path, backend, imgsz):
+    """Export the YOLO weights once to an optimized CPU format and move it into the cache"""
+    from ultralytics import YOLO
+
+    target = exported_model_path(model_path, backend, imgsz)
+    print(f"Exporting {model_path} to {backend} (imgsz={imgsz})...")
+    exported = YOLO(model_path).export(format=backend, imgsz=imgsz, dynamic=True, device="cpu")
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    if os.path.isdir(target):
+        shutil.rmtree(target)
+    elif os.path.exists(target):
+        os.remove(target)
+    shutil.move(str(exported), target)
+    return target
+
+
+def download_weights(model_path):
+    from ultralytics import YOLO
+
+    YOLO(model_path)  # Downloads the pretrained weights
+
+
+def load_pytorch_model(model_path=MODEL_PATH):
+    import torch
+    from ultralytics import YOLO
 
-def load_model():
-    # Load a pretrained YOLO model
     device = torch.device("cpu")
     if torch.cuda.is_available():
         #Get the GPU device name
@@ -11,7 +65,65 @@ def load_model():
     if torch.backends.mps.is_available():
         device = torch.device("mps")
         print("Using GPU Multi-Process Service (MPS)")
-    model_path = "yolo11n.pt"
     model = YOLO(model_path, "v11")
     model.to(device)
     return model
+
+
+def load_model(backend="pytorch", imgsz=640, model_path=MODEL_PATH):
+    """
+    Load the detection model with the requested backend ("pytorch", "onnx" or
+    "openvino"). Exported backends are built on first use and loaded from the
+    cache afterwards, straight into their runtime: ultralytics and torch are
+    only imported to export or for the PyTorch backend. Any failure falls back
+    to the PyTorch weights.
+    """
+    backend = backend or "pytorch"
+    if backend != "pytorch":
+        if backend not in EXPORT_SUFFIXES:
+            print(f"Unknown inference backend '{backend}', using PyTorch")
+        else:
+            try:
+                if not os.path.exists(model_path):
+                    download_weights(model_path)
+                path = exported_model_path(model_path, backend, imgsz)
+                if not os.path.exists(path):
+                    path = export_model(model_path, backend, imgsz)
+                model = ExportedModel(path, backend)
+                print(f"Using {backend} backend: {path}")
+                return model
+            except Exception as e:
+                print(f"Failed to load {backend} backend, falling back to PyTorch: {e}")
+    return load_pytorch_model(model_path)
+
+
+def model_input(model, batch):
+    """The stacked Letterbox batch as the model takes it: numpy for exported models, a torch tensor otherwise"""
+    if isinstance(model, ExportedModel):
+        return batch
+    import torch
+
+    return torch.from_numpy(batch)
+
+
+def warm_up(model, imgsz=640):
+    """One dummy inference on a Letterbox-shaped batch, so the first real frame skips the lazy setup"""
+    model.predict(model_input(model, np.zeros((1, 3, imgsz, imgsz), dtype=np.float32)), classes=[0], verbose=False)
+    return model
+
+
+def load_model_async(backend="pytorch", imgsz=640, model_path=MODEL_PATH):
+    """
+    Load and warm up the model on a background thread, so cameras can be probed
+    meanwhile. Returns a concurrent.futures.Future with the model.
+    """
+    future = Future()
+
+    def load():
+        try:
+            future.set_result(warm_up(load_model(backend, imgsz, model_path), imgsz))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=load, name="model-loader", daemon=True).start()
+    return future
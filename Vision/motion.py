@@ -0,0 +1,61 @@
+import cv2
+import numpy as np
+from time import time
+
+
+class MotionGate:
+    """
+    Filtro previo a la inferencia: compara una versión reducida en escala de
+    grises del frame contra un fondo promediado y solo deja pasar los frames
+    en los que cambió una fracción mínima de la imagen. Cada force_interval
+    segundos se fuerza una inferencia aunque la escena esté quieta.
+    """
+    def __init__(self, sensitivity=25, min_area=0.005, force_interval=30.0, width=160, learning_rate=0.05):
+        self.sensitivity = sensitivity  # Diferencia mínima (0-255) para considerar cambiado un píxel
+        self.min_area = min_area  # Fracción de píxeles cambiados para considerar movimiento
+        self.force_interval = force_interval
+        self.width = width
+        self.learning_rate = learning_rate
+        self.background = None
+        self.last_pass = 0.0
+        self.motion_detected = False  # Resultado de la última evaluación (sin contar las forzadas)
+        # Contadores expuestos por /motion_stats
+        self.hits = 0
+        self.misses = 0
+        self.forced = 0
+
+    def _prepare(self, frame):
+        height, width = frame.shape[:2]
+        small_size = (self.width, max(1, int(height * self.width / width)))
+        small = cv2.resize(frame, small_size, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def has_motion(self, frame):
+        """True si la fracción de píxeles que cambió respecto del fondo supera min_area."""
+        gray = self._prepare(frame)
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray.astype(np.float32)
+            return True
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+        cv2.accumulateWeighted(gray, self.background, self.learning_rate)
+        _, mask = cv2.threshold(diff, self.sensitivity, 255, cv2.THRESH_BINARY)
+        return cv2.countNonZero(mask) >= self.min_area * mask.size
+
+    def should_infer(self, frame, now=None):
+        """Decide si el frame merece pasar por el modelo."""
+        now = now if now is not None else time()
+        self.motion_detected = self.has_motion(frame)
+        if self.motion_detected:
+            self.hits += 1
+            self.last_pass = now
+            return True
+        if now - self.last_pass >= self.force_interval:
+            self.forced += 1
+            self.last_pass = now
+            return True
+        self.misses += 1
+        return False
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "forced": self.forced}
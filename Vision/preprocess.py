@@ -0,0 +1,90 @@
+import cv2
+import numpy as np
+
+
+class LetterboxInfo:
+    """Transformación aplicada por Letterbox, para volver a coordenadas del frame original."""
+    def __init__(self, scale, pad_x, pad_y, width, height):
+        self.scale = scale
+        self.pad_x = pad_x
+        self.pad_y = pad_y
+        self.width = width  # Tamaño del frame original
+        self.height = height
+
+
+class Letterbox:
+    """
+    Preprocesamiento de una cámara: un único resize que conserva la relación de
+    aspecto, escrito directamente en un buffer preasignado, y la conversión a
+    tensor CHW RGB float32 (0-1) en otro buffer reutilizado. El modelo recibe
+    así la entrada ya dimensionada y no vuelve a redimensionar.
+
+    Como en ultralytics, el lado mayor queda en imgsz y el canvas se redondea
+    hacia arriba al múltiplo de stride: un frame 16:9 cuesta 640x384 y no
+    640x640. Los buffers se asignan según la resolución de entrada, así que las
+    cámaras con la misma resolución producen tensores del mismo tamaño y se
+    agrupan en el mismo batch. Con scaleup=False (recortes de zona) la imagen
+    nunca se agranda: el canvas queda del tamaño del recorte, redondeado al
+    stride, y el modelo corre sobre menos píxeles que con el frame completo.
+
+    Los buffers se reutilizan en cada llamada: el resultado es válido hasta la
+    siguiente llamada sobre la misma instancia.
+    """
+    PAD_VALUE = 114  # Gris que usa ultralytics para el relleno
+    STRIDE = 32  # Paso máximo del modelo: alto y ancho de la entrada deben ser múltiplos
+
+    def __init__(self, imgsz=640, stride=STRIDE):
+        self.imgsz = imgsz
+        self.stride = stride
+        self.canvas = None
+        self.tensor = None
+        self.layout = None  # (width, height, scaleup, scale, pad_x, pad_y, new_width, new_height) de los buffers
+
+    def fit(self, width, height, scaleup=True):
+        """Escala, relleno y tamaño redimensionado para un frame de width x height."""
+        scale = min(self.imgsz / width, self.imgsz / height)
+        if not scaleup:
+            scale = min(scale, 1.0)
+        new_width, new_height = round(width * scale), round(height * scale)
+        canvas_width = -(-new_width // self.stride) * self.stride
+        canvas_height = -(-new_height // self.stride) * self.stride
+        pad_x, pad_y = (canvas_width - new_width) // 2, (canvas_height - new_height) // 2
+        return scale, pad_x, pad_y, new_width, new_height, canvas_width, canvas_height
+
+    def allocate(self, width, height, scaleup=True):
+        """Rehace los buffers para una nueva resolución de entrada (p. ej. otro recorte de zona)."""
+        scale, pad_x, pad_y, new_width, new_height, canvas_width, canvas_height = self.fit(width, height, scaleup)
+        self.canvas = np.full((canvas_height, canvas_width, 3), self.PAD_VALUE, dtype=np.uint8)
+        self.tensor = np.empty((3, canvas_height, canvas_width), dtype=np.float32)
+        self.layout = (width, height, scaleup, scale, pad_x, pad_y, new_width, new_height)
+
+    def __call__(self, frame, scaleup=True):
+        """Devuelve (tensor CHW, LetterboxInfo) para el frame BGR."""
+        height, width = frame.shape[:2]
+        if self.layout is None or self.layout[:3] != (width, height, scaleup):
+            self.allocate(width, height, scaleup)
+        _, _, _, scale, pad_x, pad_y, new_width, new_height = self.layout
+
+        region = self.canvas[pad_y:pad_y + new_height, pad_x:pad_x + new_width]
+        if (new_width, new_height) == (width, height):
+            region[:] = frame
+        else:
+            resized = cv2.resize(frame, (new_width, new_height), dst=region, interpolation=cv2.INTER_LINEAR)
+            if not np.shares_memory(resized, self.canvas):
+                region[:] = resized  # cv2 no pudo escribir en la vista (no contigua)
+
+        # BGR HWC uint8 -> RGB CHW float32 en una sola pasada sobre el buffer
+        np.multiply(self.canvas[:, :, ::-1].transpose(2, 0, 1), 1 / 255.0, out=self.tensor, casting="unsafe")
+        return self.tensor, LetterboxInfo(scale, pad_x, pad_y, width, height)
+
+
+def unletterbox_detections(detections, info: LetterboxInfo):
+    """Lleva en el lugar las cajas de coordenadas del canvas a las del frame original."""
+    if len(detections) == 0:
+        return detections
+    for x_field, y_field in (("x1", "y1"), ("x2", "y2")):
+        x = (detections[x_field] - info.pad_x) / info.scale
+        y = (detections[y_field] - info.pad_y) / info.scale
+        detections[x_field] = np.clip(np.round(x), 0, info.width)
+        detections[y_field] = np.clip(np.round(y), 0, info.height)
+    return detections
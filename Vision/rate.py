@@ -0,0 +1,114 @@
+import threading
+from time import time
+
+
+class CameraRate:
+    """Estado de la tasa de inferencia de una cámara."""
+    def __init__(self, rate_hz):
+        self.rate_hz = rate_hz
+        self.last_activity = 0.0
+        self.last_tracking = 0.0
+        self.last_inference = 0.0
+
+
+class InferenceRateController:
+    """
+    Asigna a cada cámara una tasa objetivo de inferencia: idle_hz cuando la
+    escena está quieta y hasta active_hz durante active_hold segundos después
+    de un movimiento o una detección. Si la cámara solo tiene tracks estables
+    (ya confirmados), el tracker predice las cajas y alcanza con tracking_hz.
+    El total se reparte dentro de budget_hz, de modo que agregar cámaras no
+    aumenta la carga total.
+    """
+    REBALANCE_INTERVAL = 0.5
+    MIN_HZ = 0.1  # Las tasas <= 0 se llevan a este mínimo: should_infer divide por la tasa
+
+    def __init__(self, idle_hz=1.0, active_hz=10.0, budget_hz=20.0, active_hold=5.0, tracking_hz=2.0):
+        self.cameras = {}  # {cam_index: CameraRate}
+        self.lock = threading.Lock()
+        self.last_rebalance = 0.0
+        self.configure(idle_hz, active_hz, budget_hz, active_hold, tracking_hz)
+
+    def configure(self, idle_hz=1.0, active_hz=10.0, budget_hz=20.0, active_hold=5.0, tracking_hz=2.0):
+        """Cambia las tasas en caliente; el reparto se recalcula en el próximo should_infer."""
+        rates = {"idle_hz": idle_hz, "active_hz": active_hz, "budget_hz": budget_hz, "tracking_hz": tracking_hz}
+        for name, rate in rates.items():
+            if rate <= 0:
+                print(f"inference.rate.{name} = {rate} no es válido; se usa {self.MIN_HZ}")
+        idle_hz, active_hz, budget_hz, tracking_hz = (max(rate, self.MIN_HZ) for rate in rates.values())
+        with self.lock:
+            self.idle_hz = idle_hz
+            self.active_hz = max(active_hz, idle_hz)
+            self.tracking_hz = min(max(tracking_hz, idle_hz), self.active_hz)
+            self.budget_hz = budget_hz
+            self.active_hold = active_hold
+            self.last_rebalance = 0.0
+
+    def register(self, cam_index):
+        with self.lock:
+            self.cameras.setdefault(cam_index, CameraRate(self.idle_hz))
+
+    def report_activity(self, cam_index, now=None):
+        """Marca movimiento o detección reciente en la cámara."""
+        now = now if now is not None else time()
+        with self.lock:
+            state = self.cameras.get(cam_index)
+            if state is None:
+                return
+            was_idle = now - state.last_activity > self.active_hold
+            state.last_activity = now
+            if was_idle:
+                self._rebalance(now)
+
+    def report_tracking(self, cam_index, now=None):
+        """Marca que la cámara sigue solo tracks estables: no hace falta la tasa activa."""
+        now = now if now is not None else time()
+        with self.lock:
+            state = self.cameras.get(cam_index)
+            if state is None:
+                return
+            state.last_tracking = now
+            # Un track estable reemplaza a la actividad que lo originó
+            state.last_activity = min(state.last_activity, now - self.active_hold - 1e-3)
+
+    def should_infer(self, cam_index, now=None):
+        """True si ya pasó el intervalo correspondiente a la tasa de la cámara."""
+        now = now if now is not None else time()
+        with self.lock:
+            if now - self.last_rebalance >= self.REBALANCE_INTERVAL:
+                self._rebalance(now)
+            state = self.cameras.get(cam_index)
+            if state is None:
+                return True
+            return now - state.last_inference >= 1.0 / state.rate_hz
+
+    def mark_inferred(self, cam_index, now=None):
+        now = now if now is not None else time()
+        with self.lock:
+            state = self.cameras.get(cam_index)
+            if state is not None:
+                state.last_inference = now
+
+    def rates(self):
+        """Tasa objetivo actual (Hz) de cada cámara."""
+        with self.lock:
+            return {cam_index: state.rate_hz for cam_index, state in self.cameras.items()}
+
+    def _rebalance(self, now):
+        self.last_rebalance = now
+        active = [s for s in self.cameras.values() if now - s.last_activity <= self.active_hold]
+        tracking = [s for s in self.cameras.values()
+                    if s not in active and now - s.last_tracking <= self.active_hold]
+        idle_count = len(self.cameras) - len(active) - len(tracking)
+        active_rate = self.active_hz
+        if active:
+            # Las cámaras quietas o con tracks estables conservan su tasa; el resto va a las activas
+            spare = self.budget_hz - idle_count * self.idle_hz - len(tracking) * self.tracking_hz
+            active_rate = min(self.active_hz, max(self.idle_hz, spare / len(active)))
+        for state in self.cameras.values():
+            if state in active:
+                state.rate_hz = active_rate
+            elif state in tracking:
+                state.rate_hz = self.tracking_hz
+            else:
+                state.rate_hz = self.idle_hz
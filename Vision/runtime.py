@@ -0,0 +1,86 @@
+import glob
+import os
+
+import cv2
+import numpy as np
+
+CONF_THRESHOLD = 0.25  # ultralytics' predict() defaults
+IOU_THRESHOLD = 0.7
+MAX_DETECTIONS = 300
+
+
+class Boxes:
+    """The part of ultralytics' Boxes that extract_detections reads: data is (N, 6) x1, y1, x2, y2, conf, cls"""
+    def __init__(self, data):
+        self.data = data
+
+    def __len__(self):
+        return len(self.data)
+
+
+class Result:
+    def __init__(self, boxes):
+        self.boxes = Boxes(boxes)
+
+
+def non_max_suppression(prediction, classes=None, conf=CONF_THRESHOLD, iou=IOU_THRESHOLD, max_det=MAX_DETECTIONS):
+    """
+    Decode the raw YOLO head output (batch, 4 + classes, anchors) into one
+    (N, 6) array per image, with per-class NMS like ultralytics' predict().
+    """
+    output = []
+    for image in prediction:
+        image = image.T  # (anchors, 4 + classes)
+        scores = image[:, 4:]
+        class_ids = np.asarray(classes) if classes is not None else np.arange(scores.shape[1])
+        scores = scores[:, class_ids]
+        best = scores.argmax(axis=1)
+        confidence = scores[np.arange(len(scores)), best]
+        keep = confidence > conf
+        if not keep.any():
+            output.append(np.zeros((0, 6), dtype=np.float32))
+            continue
+        cx, cy, w, h = image[keep, :4].T
+        confidence, cls = confidence[keep], class_ids[best[keep]]
+        xywh = np.stack([cx - w / 2, cy - h / 2, w, h], axis=1)
+        indices = np.asarray(cv2.dnn.NMSBoxesBatched(xywh.tolist(), confidence.tolist(), cls.tolist(),
+                                                     conf, iou, top_k=max_det), dtype=np.int64).reshape(-1)
+        x1, y1, w, h = xywh[indices].T
+        output.append(np.stack([x1, y1, x1 + w, y1 + h, confidence[indices], cls[indices]],
+                               axis=1).astype(np.float32))
+    return output
+
+
+class ExportedModel:
+    """
+    Cached ONNX or OpenVINO export run directly with its runtime, so the
+    exported backends load without importing ultralytics or torch. predict()
+    takes the Letterbox batch (float32 NCHW, 0-1) as a numpy array and returns
+    one Result per image with the boxes in the batch's coordinates.
+    """
+    def __init__(self, path, backend):
+        self.model_name = path
+        self.backend = backend
+        if backend == "onnx":
+            import onnxruntime
+
+            self.session = onnxruntime.InferenceSession(path, providers=["CPUExecutionProvider"])
+            self.input_name = self.session.get_inputs()[0].name
+        elif backend == "openvino":
+            import openvino
+
+            model_xml = glob.glob(os.path.join(path, "*.xml"))
+            if not model_xml:
+                raise FileNotFoundError(f"No OpenVINO model (.xml) in {path}")
+            self.compiled = openvino.Core().compile_model(model_xml[0], "CPU")
+        else:
+            raise ValueError(f"Unknown exported backend '{backend}'")
+
+    def forward(self, batch):
+        if self.backend == "onnx":
+            return self.session.run(None, {self.input_name: batch})[0]
+        return self.compiled(batch)[0]
+
+    def predict(self, frames, classes=None, verbose=False):
+        batch = np.ascontiguousarray(frames, dtype=np.float32)
+        return [Result(boxes) for boxes in non_max_suppression(self.forward(batch), classes)]
@@ -0,0 +1,141 @@
+import threading
+from collections import deque
+from time import time
+from infer import ModelInference
+from Monitoring.metrics import REGISTRY
+
+QUEUE_DEPTH = REGISTRY.gauge("sentinel_inference_queue_depth", "Frames waiting for the next inference batch")
+
+
+class InferenceRequest:
+    """Frame pendiente de inferencia de una cámara, con su resultado."""
+    def __init__(self, cam_index, frame, trace=None):
+        self.cam_index = cam_index
+        self.frame = frame
+        self.trace = trace  # Trace opcional donde se marcan las etapas de inferencia
+        self.results = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class InferenceScheduler:
+    """
+    Agrupa los frames pendientes de todas las cámaras en un único batch,
+    ejecuta un solo predict por tamaño de entrada y devuelve a cada cámara su
+    resultado.
+
+    Un batch se cierra cuando alcanza max_batch_size, cuando todas las
+    fuentes registradas tienen un frame pendiente o cuando vence max_wait_ms
+    desde que llegó el primer frame.
+    """
+    def __init__(self, model_inference: ModelInference, max_batch_size=8, max_wait_ms=10):
+        self.model_inference = model_inference
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0, max_wait_ms) / 1000.0
+        self.num_sources = 0
+        self.pending = deque()
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+        QUEUE_DEPTH.set_function(lambda: len(self.pending))
+
+    def set_sources(self, num_sources):
+        """Cantidad de cámaras que envían frames; permite cerrar el batch sin esperar."""
+        with self.condition:
+            self.num_sources = num_sources
+            self.condition.notify()
+
+    def start(self):
+        with self.condition:
+            if self.running:
+                return
+            self.running = True
+        self.thread = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+        # Liberar a las cámaras que quedaron esperando
+        while self.pending:
+            request = self.pending.popleft()
+            request.done.set()
+
+    def submit(self, cam_index, frame, trace=None):
+        """Encola un frame y devuelve la solicitud para esperar su resultado."""
+        request = InferenceRequest(cam_index, frame, trace)
+        if trace is not None:
+            trace.mark("infer_enqueued")
+        with self.condition:
+            if not self.running:
+                request.done.set()
+                return request
+            self.pending.append(request)
+            self.condition.notify()
+        return request
+
+    def infer(self, cam_index, frame, timeout=None, trace=None):
+        """Envía un frame al scheduler y bloquea hasta obtener sus resultados."""
+        request = self.submit(cam_index, frame, trace)
+        if not request.done.wait(timeout):
+            return None
+        if request.error is not None:
+            raise request.error
+        return request.results
+
+    def _batch_ready(self):
+        size = len(self.pending)
+        return size >= self.max_batch_size or (self.num_sources and size >= self.num_sources)
+
+    def _collect_batch(self):
+        with self.condition:
+            while self.running and not self.pending:
+                self.condition.wait()
+            if not self.running:
+                return []
+            deadline = time() + self.max_wait
+            while self.running and not self._batch_ready():
+                remaining = deadline - time()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            count = min(len(self.pending), self.max_batch_size)
+            return [self.pending.popleft() for _ in range(count)]
+
+    @staticmethod
+    def _by_shape(batch):
+        """Parte el batch en grupos de frames del mismo tamaño, en orden de llegada."""
+        groups = {}
+        for request in batch:
+            groups.setdefault(getattr(request.frame, "shape", None), []).append(request)
+        return list(groups.values())
+
+    def _run(self):
+        while self.running:
+            batch = self._collect_batch()
+            for group in self._by_shape(batch):
+                self._infer_group(group)
+
+    def _infer_group(self, batch):
+        """Un predict por grupo: solo los tensores del mismo tamaño se pueden apilar."""
+        started = time()
+        try:
+            results = self.model_inference.infer_batch([request.frame for request in batch])
+            finished = time()
+            for i, request in enumerate(batch):
+                if request.trace is not None:
+                    request.trace.mark("infer_start", started)
+                    request.trace.mark("infer_end", finished)
+                # Cada cámara recibe una lista, igual que model.predict con un solo frame
+                request.results = [results[i]] if results is not None else None
+        except Exception as e:
+            print(f"Error in batched inference ({len(batch)} frames): {e}")
+            for request in batch:
+                request.error = e
+        finally:
+            for request in batch:
+                request.frame = None
+                request.done.set()
@@ -0,0 +1,140 @@
+import numpy as np
+from utils import detection_boxes
+
+
+def iou_matrix(a, b):
+    """IoU entre cada caja de a (N, 4) y cada caja de b (M, 4), en formato x1, y1, x2, y2."""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return intersection / np.maximum(union, 1e-6)
+
+
+class Track:
+    """
+    Persona seguida entre frames. La posición se estima con un filtro
+    alfa-beta (Kalman de velocidad constante simplificado), lo que permite
+    predecir la caja en los frames en los que no se corre inferencia.
+
+    La predicción no avanza más de max_dt segundos (el intervalo esperado
+    entre inferencias): con la tasa baja de tracking, o tras un hueco del
+    gate de movimiento, extrapolar la velocidad sin límite deja la caja lejos
+    de una persona que se detuvo. Un residuo grande en contra de la velocidad
+    (la persona frenó o dobló) o un track sin actualizar durante más de
+    2 * max_dt descartan la velocidad estimada.
+    """
+    ALPHA = 0.6  # Peso de la medición sobre la posición predicha
+    BETA = 0.1  # Peso del residuo sobre la velocidad
+    RESET_RESIDUAL = 0.2  # Residuo en contra de la velocidad, relativo al ancho o alto de la caja, que la anula
+
+    def __init__(self, track_id, box, conf, now):
+        self.id = track_id
+        self.box = np.asarray(box, dtype=np.float32)
+        self.velocity = np.zeros(4, dtype=np.float32)  # px/s de cada coordenada
+        self.conf = conf
+        self.hits = 1
+        self.last_update = now
+        self.alerted = False
+
+    def predict(self, now, max_dt=0.5):
+        return self.box + self.velocity * min(now - self.last_update, max_dt)
+
+    def update(self, box, conf, now, max_dt=0.5):
+        box = np.asarray(box, dtype=np.float32)
+        elapsed = now - self.last_update
+        dt = min(max(elapsed, 1e-3), max_dt)
+        predicted = self.predict(now, max_dt)
+        residual = box - predicted
+        self.box = predicted + self.ALPHA * residual
+        width, height = max(box[2] - box[0], 1.0), max(box[3] - box[1], 1.0)
+        overshoot = -residual * np.sign(self.velocity) / np.array([width, height, width, height], dtype=np.float32)
+        if elapsed > 2 * max_dt or overshoot.max() > self.RESET_RESIDUAL:
+            # Cambio de movimiento (p. ej. se detuvo) o velocidad vieja: no seguir extrapolándola
+            self.velocity[:] = 0
+        else:
+            self.velocity = self.velocity + self.BETA * residual / dt
+        self.conf = conf
+        self.hits += 1
+        self.last_update = now
+
+
+class IoUTracker:
+    """
+    Tracker por cámara que asocia detecciones con tracks por IoU sobre la
+    posición predicha y, si no alcanza, sobre la última caja medida, antes de
+    crear un track nuevo. Un track dispara una única alerta cuando alcanza
+    min_hits detecciones; se descarta tras max_age segundos sin verse.
+    max_predict es el máximo que se extrapola una caja, 1 / tracking_hz.
+    """
+    def __init__(self, iou_threshold=0.3, min_hits=3, max_age=2.0, max_predict=0.5):
+        self.iou_threshold = iou_threshold
+        self.min_hits = min_hits
+        self.max_age = max_age
+        self.max_predict = max_predict
+        self.tracks = []
+        self.next_id = 1
+
+    def update(self, detections, now):
+        """
+        Actualiza los tracks con las detecciones (array estructurado con campos
+        x1, y1, x2, y2 y conf). Devuelve los tracks que acaban de confirmarse
+        y deben alertar.
+        """
+        confs = detections["conf"]
+        detections = detection_boxes(detections).astype(np.float32)
+        predicted = np.array([track.predict(now, self.max_predict) for track in self.tracks],
+                             dtype=np.float32).reshape(-1, 4)
+        last_boxes = np.array([track.box for track in self.tracks], dtype=np.float32).reshape(-1, 4)
+        matched_tracks, matched_detections = set(), set()
+        self._associate(predicted, detections, confs, now, matched_tracks, matched_detections)
+        # Una persona que frenó queda sobre la última caja medida y no sobre la predicha
+        self._associate(last_boxes, detections, confs, now, matched_tracks, matched_detections)
+
+        for d in range(len(detections)):
+            if d not in matched_detections:
+                self.tracks.append(Track(self.next_id, detections[d], float(confs[d]), now))
+                self.next_id += 1
+
+        self.tracks = [track for track in self.tracks if now - track.last_update <= self.max_age]
+
+        confirmed = []
+        for track in self.tracks:
+            if not track.alerted and track.hits >= self.min_hits:
+                track.alerted = True
+                confirmed.append(track)
+        return confirmed
+
+    def _associate(self, boxes, detections, confs, now, matched_tracks, matched_detections):
+        """Asociación greedy por IoU entre las cajas de los tracks y las detecciones sin asignar."""
+        ious = iou_matrix(boxes, detections)
+        if not ious.size:
+            return
+        # Primero los pares con mayor IoU
+        for flat in np.argsort(-ious, axis=None):
+            t, d = np.unravel_index(flat, ious.shape)
+            if ious[t, d] < self.iou_threshold:
+                break
+            if t in matched_tracks or d in matched_detections:
+                continue
+            self.tracks[t].update(detections[d], float(confs[d]), now, self.max_predict)
+            matched_tracks.add(t)
+            matched_detections.add(d)
+
+    def predicted_boxes(self, now):
+        """Cajas estimadas de los tracks vivos: [(track_id, x1, y1, x2, y2)]."""
+        return [(track.id, *map(int, track.predict(now, self.max_predict))) for track in self.tracks]
+
+    def has_tentative(self):
+        """True si hay tracks que todavía no alcanzaron min_hits."""
+        return any(not track.alerted for track in self.tracks)
+
+    def is_stable(self):
+        """True si hay tracks y todos ya están confirmados."""
+        return bool(self.tracks) and not self.has_tentative()
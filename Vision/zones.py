@@ -0,0 +1,63 @@
+import cv2
+import numpy as np
+
+
+def parse_polygon(points):
+    """
+    Convierte ["x,y", ...] con coordenadas normalizadas (0-1) en [[x, y], ...].
+    Lanza ValueError si hay menos de 3 puntos o alguno está fuera de rango.
+    """
+    polygon = []
+    for point in points:
+        x, y = (float(value) for value in point.split(","))
+        if not (0 <= x <= 1 and 0 <= y <= 1):
+            raise ValueError(f"Punto fuera de rango: {point}")
+        polygon.append([x, y])
+    if len(polygon) < 3:
+        raise ValueError("Una zona necesita al menos 3 puntos")
+    return polygon
+
+
+class ZoneMask:
+    """
+    Zonas de detección de una cámara: polígonos en coordenadas normalizadas.
+    La inferencia se corre solo sobre el rectángulo que contiene a todas las
+    zonas, y las detecciones cuyo punto de apoyo (centro del borde inferior de
+    la caja) cae fuera de los polígonos se descartan con una máscara rasterizada
+    una única vez por resolución.
+    """
+    def __init__(self, polygons, margin=0.05):
+        self.source = polygons  # Polígonos tal como vienen de la configuración
+        self.polygons = [np.asarray(polygon, dtype=np.float32) for polygon in polygons]
+        self.margin = margin  # Margen alrededor de las zonas para no cortar a las personas en el borde
+        self.masks = {}  # {(width, height): máscara uint8}
+
+    def crop_rect(self, width, height):
+        """Rectángulo (x1, y1, x2, y2) en píxeles que contiene todas las zonas más el margen."""
+        points = np.concatenate(self.polygons)
+        x1, y1 = np.clip(points.min(axis=0) - self.margin, 0, 1)
+        x2, y2 = np.clip(points.max(axis=0) + self.margin, 0, 1)
+        return int(x1 * width), int(y1 * height), int(np.ceil(x2 * width)), int(np.ceil(y2 * height))
+
+    def mask(self, width, height):
+        mask = self.masks.get((width, height))
+        if mask is None:
+            mask = np.zeros((height, width), dtype=np.uint8)
+            scale = np.array([width, height], dtype=np.float32)
+            cv2.fillPoly(mask, [np.round(polygon * scale).astype(np.int32) for polygon in self.polygons], 1)
+            self.masks[(width, height)] = mask
+        return mask
+
+    def filter(self, detections, width, height):
+        """Deja solo las detecciones con el punto de apoyo dentro de alguna zona."""
+        if len(detections) == 0:
+            return detections
+        feet_x = np.clip((detections["x1"] + detections["x2"]) // 2, 0, width - 1)
+        feet_y = np.clip(detections["y2"], 0, height - 1)
+        return detections[self.mask(width, height)[feet_y, feet_x].astype(bool)]
+
+    def draw(self, frame):
+        height, width = frame.shape[:2]
+        scale = np.array([width, height], dtype=np.float32)
+        cv2.polylines(frame, [np.round(polygon * scale).astype(np.int32) for polygon in self.polygons],
+                      True, (255, 128, 0), 1)
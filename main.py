@@ -1,14 +1,20 @@
 from Memory.memory import MemoryData
-from model import load_model
-from cameraProcessor import CameraProcessor
+from Monitoring.profiler import PROFILER, install_signal_handler
 
 def main():
-    # Load memory and model
+    # Imported here: spawned capture processes re-import this module and must not load torch, ultralytics or telebot
+    from model import load_model_async
+    from cameraProcessor import CameraProcessor
+    
+    # Load memory; the model loads and warms up in the background while the cameras are probed
     memory = MemoryData()
-    model = load_model()
+    model = load_model_async(memory.get_nested("inference.backend"),
+                             memory.get_nested("inference.imgsz") or 640)
     
     # Create and start camera processor
     processor = CameraProcessor(memory, model)
+    # kill -USR1 <pid> writes a profile of the next profiling.seconds
+    install_signal_handler(PROFILER)
     processor.start()
 
 if __name__ == "__main__":
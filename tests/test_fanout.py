@@ -0,0 +1,56 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+import telebot
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "Benchmark")]
+
+from Bot.fanout import AlertFanout
+from fake_telegram import FakeTelegramServer
+
+SUBSCRIBERS = ["1001", "1002", "1003", "1004"]
+
+
+def photo():
+    return cv2.imencode(".jpg", np.zeros((72, 128, 3), dtype=np.uint8))[1].tobytes()
+
+
+def start_fanout(request, **server_options):
+    """AlertFanout with a real TeleBot talking to a local FakeTelegramServer"""
+    server = FakeTelegramServer(**server_options).start()
+    api_url = telebot.apihelper.API_URL
+    telebot.apihelper.API_URL = server.url + "/bot{0}/{1}"
+    fanout = AlertFanout(telebot.TeleBot("123456:test"))
+
+    def stop():
+        fanout.shutdown()
+        telebot.apihelper.API_URL = api_url
+        server.stop()
+
+    request.addfinalizer(stop)
+    return server, fanout
+
+
+def test_uploads_once_and_sends_file_id_to_the_rest(request):
+    server, fanout = start_fanout(request)
+    delivered = fanout.send_photo(SUBSCRIBERS, photo(), "Alerta")
+    assert sorted(delivered) == SUBSCRIBERS
+    stats = server.stats()
+    assert stats["uploads"] == 1
+    assert stats["by_reference"] == len(SUBSCRIBERS) - 1
+    uploaded = server.sent[0][2]
+    assert all(file_id == uploaded for _, _, file_id, _ in server.sent)
+
+
+def test_retries_a_throttled_send(request):
+    # Every third send gets a 429 with retry_after=1
+    server, fanout = start_fanout(request, throttle_every=3)
+    delivered = fanout.send_photo(SUBSCRIBERS, photo(), "Alerta")
+    assert sorted(delivered) == SUBSCRIBERS
+    stats = server.stats()
+    assert stats["throttled"] == 1
+    assert stats["uploads"] == 1
+    assert stats["by_reference"] == len(SUBSCRIBERS) - 1
@@ -0,0 +1,69 @@
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "Vision")]
+
+from tracker import IoUTracker
+from utils import DETECTION_DTYPE
+
+TRACKING_HZ = 2.0
+ACTIVE_HZ = 10.0
+SPEED = 100.0  # px/s
+WIDTH, HEIGHT = 80, 160
+
+
+def person_at(x):
+    detections = np.zeros(1, dtype=DETECTION_DTYPE)
+    detections[0] = (x, 200, x + WIDTH, 200 + HEIGHT, 0.9, 0)
+    return detections
+
+
+def run(tracker, positions):
+    """positions: [(now, x)]. Returns the confirmed track ids in order."""
+    confirmed = []
+    for now, x in positions:
+        confirmed += [track.id for track in tracker.update(person_at(x), now)]
+    return confirmed
+
+
+def walk_then_stop(gap_after_stop):
+    """Walks at SPEED, inferred at ACTIVE_HZ until confirmed and at TRACKING_HZ afterwards, then stops."""
+    positions, now, x = [], 0.0, 100.0
+    for _ in range(5):
+        positions.append((now, x))
+        now += 1 / ACTIVE_HZ
+        x += SPEED / ACTIVE_HZ
+    for _ in range(6):
+        positions.append((now, x))
+        now += 1 / TRACKING_HZ
+        x += SPEED / TRACKING_HZ
+    # Stops halfway between two inferences and stays there
+    x -= SPEED / TRACKING_HZ / 2
+    now += gap_after_stop - 1 / TRACKING_HZ
+    for _ in range(6):
+        positions.append((now, x))
+        now += 1 / TRACKING_HZ
+    return positions
+
+
+def test_walk_then_stop_keeps_one_track():
+    tracker = IoUTracker(max_predict=1 / TRACKING_HZ)
+    assert run(tracker, walk_then_stop(1 / TRACKING_HZ)) == [1]
+    assert [track.id for track in tracker.tracks] == [1]
+
+
+def test_stop_after_motion_gate_gap_keeps_one_track():
+    tracker = IoUTracker(max_predict=1 / TRACKING_HZ)
+    assert run(tracker, walk_then_stop(1.5)) == [1]
+    assert [track.id for track in tracker.tracks] == [1]
+
+
+def test_stopped_track_drops_its_velocity():
+    tracker = IoUTracker(max_predict=1 / TRACKING_HZ)
+    positions = walk_then_stop(1 / TRACKING_HZ)
+    run(tracker, positions)
+    now, x = positions[-1]
+    np.testing.assert_allclose(tracker.tracks[0].predict(now + 1 / TRACKING_HZ, tracker.max_predict)[0], x, atol=5)
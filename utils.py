@@ -1,28 +1,76 @@
 import cv2
-from time import time
 import numpy as np
 
-# Función para dibujar cuadros y contar detecciones
-def draw_boxes(frame, results, detection_count, detection_timeframes, infer_threshold, cam_index):
-    detected = False  # Para verificar si se detectó alguna persona
-    boxes = []  # Lista para almacenar las coordenadas de las cajas
+PERSON_CLASS = 0
+
+# Detecciones compactas: una fila por caja, en coordenadas del frame
+DETECTION_DTYPE = np.dtype([
+    ("x1", np.int32), ("y1", np.int32), ("x2", np.int32), ("y2", np.int32),
+    ("conf", np.float32), ("cls", np.int16),
+])
+
+def empty_detections():
+    return np.zeros(0, dtype=DETECTION_DTYPE)
+
+# Función para extraer las personas detectadas de los resultados del modelo
+def extract_detections(results, infer_threshold, class_id=PERSON_CLASS):
+    """
+    Convierte los resultados del modelo en un array estructurado DETECTION_DTYPE.
+    Copia una sola vez por resultado el tensor (N, 6) [x1, y1, x2, y2, conf, cls]
+    y filtra por clase y threshold con máscaras, sin recorrer caja por caja.
+    """
     if results is None:
-        return False, boxes
+        return empty_detections()
+    chunks = []
     for result in results:
-        for box in result.boxes:
-            if int(box.cls[0]) == 0 and box.conf[0] >= infer_threshold:
-                detected = True
-                detection_count[cam_index] += 1  # Incrementar el contador de detecciones
-                detection_timeframes[cam_index] = time()  # Actualizar tiempo de detección
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                conf = box.conf[0]
-                boxes.append((x1, y1, x2, y2, conf))  # Guardar la caja y la confianza
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                cv2.putText(frame, f"Persona {conf:.2f}", (x1, y1 - 10),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-    return detected, boxes  # Retorna si se detectó alguna persona y las cajas
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            continue
+        data = boxes.data
+        data = data.cpu().numpy() if hasattr(data, "cpu") else np.asarray(data)
+        # Con tracking activado el modelo agrega una columna de id antes de conf y cls
+        conf, cls = data[:, -2], data[:, -1]
+        mask = (cls == class_id) & (conf >= infer_threshold)
+        if not mask.any():
+            continue
+        chunk = np.empty(int(mask.sum()), dtype=DETECTION_DTYPE)
+        xyxy = data[mask, :4].astype(np.int32)
+        chunk["x1"], chunk["y1"], chunk["x2"], chunk["y2"] = xyxy.T
+        chunk["conf"] = conf[mask]
+        chunk["cls"] = cls[mask]
+        chunks.append(chunk)
+    if not chunks:
+        return empty_detections()
+    return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
 
-def create_combined_frame(original_frame, boxes):
+def detection_boxes(detections):
+    """Coordenadas de las detecciones como array (N, 4) x1, y1, x2, y2."""
+    return np.stack([detections["x1"], detections["y1"], detections["x2"], detections["y2"]], axis=1)
+
+def offset_detections(detections, dx, dy):
+    """Traslada en el lugar detecciones hechas sobre un recorte al frame completo."""
+    detections["x1"] += dx
+    detections["x2"] += dx
+    detections["y1"] += dy
+    detections["y2"] += dy
+    return detections
+
+# Función para dibujar cuadros de las personas detectadas
+def draw_boxes(frame, detections):
+    for x1, y1, x2, y2, conf, _ in detections.tolist():
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        cv2.putText(frame, f"Persona {conf:.2f}", (x1, y1 - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+
+# Función para dibujar las cajas predichas por el tracker entre inferencias
+def draw_tracks(frame, tracks, scale=1.0):
+    for track_id, x1, y1, x2, y2 in tracks:
+        x1, y1, x2, y2 = (round(value * scale) for value in (x1, y1, x2, y2))
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 200, 255), 2)
+        cv2.putText(frame, f"ID {track_id}", (x1, y1 - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 200, 255), 2)
+
+def create_combined_frame(original_frame, detections):
     """
     Creates a combined frame with:
     - Left side: Complete original frame
@@ -30,7 +78,7 @@ def create_combined_frame(original_frame, boxes):
     
     Args:
         original_frame: The complete original frame
-        boxes: List of detection boxes (x1, y1, x2, y2, conf)
+        detections: DETECTION_DTYPE array of detections
     """
     height, width = original_frame.shape[:2]
     
@@ -41,9 +89,9 @@ def create_combined_frame(original_frame, boxes):
     combined_frame[:, :width] = original_frame
     
     # For the right side, we'll show the detection area
-    if boxes:
+    if len(detections):
         # Get the bounding box coordinates of the first detection
-        x1, y1, x2, y2, conf = boxes[0]  # Using first detection for simplicity
+        x1, y1, x2, y2, conf, _ = detections[:1].tolist()[0]  # Using first detection for simplicity
         
         # Extract the region of interest (ROI)
         roi = original_frame[y1:y2, x1:x2]
@@ -83,7 +131,4 @@ def create_combined_frame(original_frame, boxes):
                     cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
     
     return combined_frame
-    
-def show_frame(frame, cam_index):
-    cv2.imshow(f"CAM {cam_index}", frame)
 